@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from alembic.runtime.migration import MigrationContext
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -19,6 +20,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 from app.db import models
 from app.db import Base
+from app.db import online_migrations
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
@@ -58,6 +60,14 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    Each migration runs in its own transaction with a lock_timeout
+    (``-x lock_timeout=5s``), so a DDL statement stuck behind a long
+    transaction fails instead of stalling all traffic on the table.
+
+    ``-x dry_run=true`` renders the SQL of every pending migration without
+    executing it and prints a per-step cost estimate from the live table
+    statistics (see app.db.online_migrations).
+
     """
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
@@ -66,9 +76,32 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        if online_migrations.is_dry_run():
+            buffer = online_migrations.CostEstimatingBuffer(connection)
+            # Without a starting revision, as_sql renders the whole history from base.
+            current = MigrationContext.configure(connection).get_current_revision()
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                as_sql=True,
+                starting_rev=current,
+                output_buffer=buffer,
+                transaction_per_migration=True,
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+            print("\n;\n".join(buffer.sql))
+            print(buffer.report())
+            return
+
+        lock_timeout = online_migrations.x_argument("lock_timeout", "5s")
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
+        connection.exec_driver_sql(f"SET lock_timeout = '{lock_timeout}'")
+        connection.commit()
 
         with context.begin_transaction():
             context.run_migrations()
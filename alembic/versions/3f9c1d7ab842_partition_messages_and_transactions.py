@@ -0,0 +1,142 @@
+"""partition messages and transactions by month
+
+Revision ID: 3f9c1d7ab842
+Revises: a2926afba842
+Create Date: 2026-10-19 12:05:41.118204
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d7ab842'
+down_revision: Union[str, None] = 'a2926afba842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(table: str, column: str) -> None:
+    """Create one partition per month from the oldest legacy row to MONTHS_AHEAD from now."""
+    oldest = None
+    if not op.get_context().as_sql:
+        oldest = op.get_bind().execute(sa.text(f'SELECT min("{column}") FROM {table}_unpartitioned')).scalar()
+    today = date.today()
+    month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+    end = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= end:
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # messages -> RANGE (timestamp); the partition key has to be part of the primary key.
+    op.execute("ALTER TABLE messages RENAME TO messages_unpartitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_session_id RENAME TO ix_messages_unpartitioned_session_id")
+    op.execute("""
+        CREATE TABLE messages (
+            message_id UUID NOT NULL,
+            session_id UUID NOT NULL REFERENCES sessions (session_id),
+            sender senderenum NOT NULL,
+            content VARCHAR NOT NULL,
+            message_metadata JSONB,
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            CONSTRAINT messages_pkey PRIMARY KEY (message_id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.create_index('ix_messages_session_id', 'messages', ['session_id'], unique=False)
+    _create_monthly_partitions('messages', 'timestamp')
+    op.execute("""
+        INSERT INTO messages (message_id, session_id, sender, content, message_metadata, "timestamp")
+        SELECT message_id, session_id, sender, content, message_metadata,
+               COALESCE("timestamp", now() AT TIME ZONE 'utc')
+        FROM messages_unpartitioned
+    """)
+    op.execute("DROP TABLE messages_unpartitioned")
+
+    # transactions -> RANGE (created_at); reference_id stays unique per partition key.
+    op.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+    op.execute("ALTER INDEX transactions_pkey RENAME TO transactions_unpartitioned_pkey")
+    op.execute("ALTER INDEX transactions_reference_id_key RENAME TO transactions_unpartitioned_reference_id_key")
+    op.execute("ALTER INDEX ix_transaction_from_account RENAME TO ix_transaction_unpartitioned_from_account")
+    op.execute("""
+        CREATE TABLE transactions (
+            transaction_id UUID NOT NULL,
+            from_account_id UUID NOT NULL REFERENCES accounts (account_id),
+            to_account_number VARCHAR NOT NULL,
+            amount NUMERIC(15, 2) NOT NULL,
+            status transactionstatusenum NOT NULL,
+            reference_id VARCHAR,
+            message_metadata JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            CONSTRAINT transactions_pkey PRIMARY KEY (transaction_id, created_at),
+            CONSTRAINT uq_transactions_reference_id UNIQUE (reference_id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index('ix_transaction_from_account', 'transactions', ['from_account_id'], unique=False)
+    _create_monthly_partitions('transactions', 'created_at')
+    op.execute("""
+        INSERT INTO transactions (transaction_id, from_account_id, to_account_number, amount, status,
+                                  reference_id, message_metadata, created_at)
+        SELECT transaction_id, from_account_id, to_account_number, amount, status,
+               reference_id, message_metadata, COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM transactions_unpartitioned
+    """)
+    op.execute("DROP TABLE transactions_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute("ALTER INDEX transactions_pkey RENAME TO transactions_partitioned_pkey")
+    op.execute("ALTER INDEX ix_transaction_from_account RENAME TO ix_transaction_partitioned_from_account")
+    op.create_table('transactions',
+    sa.Column('transaction_id', sa.UUID(), nullable=False),
+    sa.Column('from_account_id', sa.UUID(), nullable=False),
+    sa.Column('to_account_number', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('status', postgresql.ENUM('pending', 'completed', 'failed', name='transactionstatusenum', create_type=False), nullable=False),
+    sa.Column('reference_id', sa.String(), nullable=True),
+    sa.Column('message_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['from_account_id'], ['accounts.account_id'], ),
+    sa.PrimaryKeyConstraint('transaction_id'),
+    sa.UniqueConstraint('reference_id')
+    )
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_partitioned")
+    op.execute("DROP TABLE transactions_partitioned CASCADE")
+    op.create_index('ix_transaction_from_account', 'transactions', ['from_account_id'], unique=False)
+
+    op.execute("ALTER TABLE messages RENAME TO messages_partitioned")
+    op.execute("ALTER INDEX messages_pkey RENAME TO messages_partitioned_pkey")
+    op.execute("ALTER INDEX ix_messages_session_id RENAME TO ix_messages_partitioned_session_id")
+    op.create_table('messages',
+    sa.Column('message_id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('sender', postgresql.ENUM('user', 'bot', name='senderenum', create_type=False), nullable=False),
+    sa.Column('content', sa.String(), nullable=False),
+    sa.Column('message_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('message_id')
+    )
+    op.execute("INSERT INTO messages SELECT * FROM messages_partitioned")
+    op.execute("DROP TABLE messages_partitioned CASCADE")
+    op.create_index('ix_messages_session_id', 'messages', ['session_id'], unique=False)
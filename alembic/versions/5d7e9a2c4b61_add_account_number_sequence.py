@@ -0,0 +1,28 @@
+"""add account number sequence
+
+Revision ID: 5d7e9a2c4b61
+Revises: 8b2e4f6a1c3d
+Create Date: 2026-10-19 14:02:55.730419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7e9a2c4b61'
+down_revision: Union[str, None] = '8b2e4f6a1c3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # INCREMENT BY is the allocator's block size (app.services.account_numbers.BLOCK_SIZE).
+    op.execute("CREATE SEQUENCE IF NOT EXISTS account_number_seq START WITH 1 INCREMENT BY 100 CACHE 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP SEQUENCE IF EXISTS account_number_seq")
@@ -0,0 +1,64 @@
+"""rationalize indexes for the ORM query paths
+
+Revision ID: 8b2e4f6a1c3d
+Revises: 3f9c1d7ab842
+Create Date: 2026-10-19 13:20:07.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import online_migrations as online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f6a1c3d'
+down_revision: Union[str, None] = '3f9c1d7ab842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # users: the unique index on email already serves every email lookup.
+    online.drop_index_concurrently('ix_users_email_phone', 'users')
+
+    # sessions: history is listed per user newest first, and the active session is
+    # looked up on every chat request.
+    online.create_index_concurrently('ix_sessions_user_started', 'sessions', ['user_id', sa.text('started_at DESC')])
+    online.create_index_concurrently('ix_sessions_user_active', 'sessions', ['user_id'], where='is_active')
+    online.drop_index_concurrently('ix_sessions_user_id', 'sessions')
+
+    # accounts: active-account lookup by user.
+    online.create_index_concurrently('ix_accounts_user_active', 'accounts', ['user_id'], where='is_active')
+
+    # messages: transcripts are read per session in timestamp order.
+    online.create_partitioned_index_concurrently('ix_messages_session_timestamp', 'messages', ['session_id', 'timestamp'])
+    op.drop_index('ix_messages_session_id', table_name='messages')
+
+    # transactions: outgoing history newest first, and incoming transfers by number.
+    online.create_partitioned_index_concurrently('ix_transactions_from_account_created', 'transactions', ['from_account_id', 'created_at'])
+    online.create_partitioned_index_concurrently('ix_transactions_to_account_created', 'transactions', ['to_account_number', 'created_at'])
+    op.drop_index('ix_transaction_from_account', table_name='transactions')
+
+    # agent_events: per-session timelines in order.
+    online.create_index_concurrently('ix_agent_events_session_created', 'agent_events', ['session_id', 'created_at'])
+    online.drop_index_concurrently('ix_agent_event_session', 'agent_events')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_agent_events_session_created', table_name='agent_events')
+    op.create_index('ix_agent_event_session', 'agent_events', ['session_id'], unique=False)
+    op.drop_index('ix_transactions_to_account_created', table_name='transactions')
+    op.drop_index('ix_transactions_from_account_created', table_name='transactions')
+    op.create_index('ix_transaction_from_account', 'transactions', ['from_account_id'], unique=False)
+    op.drop_index('ix_messages_session_timestamp', table_name='messages')
+    op.create_index('ix_messages_session_id', 'messages', ['session_id'], unique=False)
+    op.drop_index('ix_accounts_user_active', table_name='accounts')
+    op.drop_index('ix_sessions_user_active', table_name='sessions')
+    op.drop_index('ix_sessions_user_started', table_name='sessions')
+    op.create_index('ix_sessions_user_id', 'sessions', ['user_id'], unique=False)
+    op.create_index('ix_users_email_phone', 'users', ['email', 'phone_number'], unique=False)
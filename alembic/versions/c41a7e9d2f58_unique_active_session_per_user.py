@@ -0,0 +1,39 @@
+"""at most one active session per user
+
+Revision ID: c41a7e9d2f58
+Revises: 5d7e9a2c4b61
+Create Date: 2026-10-19 14:31:12.580924
+
+"""
+from typing import Sequence, Union
+
+from app.db import online_migrations as online
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a7e9d2f58'
+down_revision: Union[str, None] = '5d7e9a2c4b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # End every active session that has a newer active sibling, so the unique index can build.
+    # ended_at is naive UTC; a NULL started_at counts as the oldest.
+    online.batched_backfill(
+        'sessions',
+        "is_active = false, ended_at = timezone('utc', now())",
+        "is_active AND EXISTS (SELECT 1 FROM sessions newer WHERE newer.user_id = sessions.user_id "
+        "AND newer.is_active AND (COALESCE(newer.started_at, '-infinity'), newer.session_id) "
+        "> (COALESCE(sessions.started_at, '-infinity'), sessions.session_id))",
+        key='session_id',
+    )
+    online.create_index_concurrently('uq_sessions_user_active', 'sessions', ['user_id'], unique=True, where='is_active')
+    online.drop_index_concurrently('ix_sessions_user_active', 'sessions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    online.create_index_concurrently('ix_sessions_user_active', 'sessions', ['user_id'], where='is_active')
+    online.drop_index_concurrently('uq_sessions_user_active', 'sessions')
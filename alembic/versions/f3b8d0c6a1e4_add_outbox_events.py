@@ -0,0 +1,43 @@
+"""add outbox events
+
+Revision ID: f3b8d0c6a1e4
+Revises: c41a7e9d2f58
+Create Date: 2026-10-19 15:10:43.118206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d0c6a1e4'
+down_revision: Union[str, None] = 'c41a7e9d2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_events',
+    sa.Column('event_id', sa.UUID(), nullable=False),
+    sa.Column('aggregate_type', sa.String(), nullable=False),
+    sa.Column('aggregate_id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    # The relay only ever scans the unpublished tail; the purge only the published rows.
+    op.create_index('ix_outbox_events_unpublished', 'outbox_events', ['event_id'], postgresql_where=sa.text('published_at IS NULL'))
+    op.create_index('ix_outbox_events_published', 'outbox_events', ['published_at'], postgresql_where=sa.text('published_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_published', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_unpublished', table_name='outbox_events')
+    op.drop_table('outbox_events')
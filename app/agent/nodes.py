@@ -1,18 +1,29 @@
-from langsmith import traceable
 from .state import OverallState
 from langgraph.graph import END
 from langgraph.types import Command,interrupt
 from langchain_core.messages import AIMessage,HumanMessage
 from typing import Annotated, Literal
-from .utils import create_llm,format_conversation,extract_tool_schemas
+from .utils import create_llm,format_conversation,extract_tool_schemas,ainvoke_llm,format_known_accounts,run_tool_calls,format_tool_results
 from app.schemas import FunctionCallPayload
-from app.shared import client
+from app.core.metrics import instrument_node
+from app.core.agent_events import record_node_events
+from app.core.tracing import traced
 from .prompts import TOOL_CALLING_PROMPT,MISSING_INFO_PROMPT
 from app.agent.tools import (
-    create_transaction_tool,create_account,get_account_info,update_account_info,delete_account,get_transaction_tool,list_transactions_by_account_tool)
+    create_transaction_tool,create_account,get_account_info,update_account_info,delete_account,get_transaction_tool,list_transactions_by_account_tool,
+    READ_ONLY_TOOLS)
 import json
+import logging
 
-@traceable(client=client, project_name="bank-bot",name="intent-classify", run_type="chain")
+logger = logging.getLogger(__name__)
+
+
+def _user_id(state: OverallState) -> str | None:
+    return str(state["user_id"]) if state.get("user_id") else None
+
+@instrument_node("intent_classifier")
+@record_node_events("intent_classifier")
+@traced(name="intent-classify")
 async def intent_classifier(state: OverallState) -> Command[Literal["account_info_agent", "transaction_agent", "help_agent", "__end__"]]:
     """
     Classify the user's intent based on the conversation state.
@@ -32,7 +43,7 @@ async def intent_classifier(state: OverallState) -> Command[Literal["account_inf
     Respond with only one of: account_info, transaction, help.
     """
     llm = create_llm()
-    response = await llm.ainvoke([{"role": "user", "content": prompt}])
+    response = await ainvoke_llm(llm, [{"role": "user", "content": prompt}], node="intent_classifier")
     intent = response.content.strip().lower()
 
     valid_intents = {"account_info", "transaction", "help"}
@@ -42,13 +53,14 @@ async def intent_classifier(state: OverallState) -> Command[Literal["account_inf
     next_agent = f"{intent}_agent"
 
     classification_msg = AIMessage(content=f"Intent classified as '{intent}'. Routing to {next_agent}.")
-    updated_messages = state["messages"] + [classification_msg]
 
-    return Command(goto=next_agent, update={"messages": updated_messages, "current_intent": intent})
+    return Command(goto=next_agent, update={"internal_messages": [classification_msg], "current_intent": intent})
 
-@traceable(client=client, project_name="bank-bot", name="auth", run_type="chain")
+@instrument_node("auth_agent")
+@record_node_events("auth_agent")
+@traced(name="auth")
 async def auth_agent(state: OverallState) -> Command:
-    print("Running auth_agent with state:", state)
+    logger.debug("Running auth_agent with state: %s", state)
     if state.get("is_authenticated") and not state.get("reauth_required"):
         intent = state.get("current_intent")
         if intent == "account_info":
@@ -62,7 +74,7 @@ async def auth_agent(state: OverallState) -> Command:
     updated_state = {
         "is_authenticated": True,
         "reauth_required": False,
-        "messages": state["messages"] + [
+        "internal_messages": [
             HumanMessage(content="Simulated OTP: 123456"),
             AIMessage(content="OTP verified successfully."),
         ],
@@ -73,7 +85,9 @@ async def auth_agent(state: OverallState) -> Command:
     return Command(goto=next_agent, update=updated_state)
 
 
-@traceable(client=client, project_name="bank-bot", name="account-info", run_type="chain")
+@instrument_node("account_info_agent")
+@record_node_events("account_info_agent")
+@traced(name="account-info")
 async def account_info_agent(state: OverallState) -> Command[Literal["auth_agent", "__end__"]]:
 
     
@@ -87,24 +101,27 @@ async def account_info_agent(state: OverallState) -> Command[Literal["auth_agent
     prompt = TOOL_CALLING_PROMPT.format(
         tool_schemas_json=json.dumps(tool_schemas),
         chat_history=format_conversation(state["messages"]),
+        known_accounts=format_known_accounts(state.get("banking_context")),
         user_input=state["messages"][-1].content
     )
 
     # structured_llm = llm.with_structured_output(FunctionCallPayload)
-    response = await llm.ainvoke([{"role": "user", "content": prompt}])
+    response = await ainvoke_llm(llm, [{"role": "user", "content": prompt}], node="account_info_agent")
     response = FunctionCallPayload.model_validate_json(response.content)
-    print("LLM response:", response)
-    tool_names = [tool.name for tool in tools]
+    logger.debug("LLM tool selection: %s", response)
+    calls = response.planned_calls()
+    tool_map = {tool.name: tool for tool in tools}
+    missing = sorted({field for call in calls for field in call.missing} - {"token"})
 
     if (
-        response.tool is None
-        or response.tool not in tool_names
-        or set(response.missing) - {"token"}
+        not calls
+        or any(call.tool not in tool_map for call in calls)
+        or missing
     ):
-        missing_info_response = await llm.ainvoke(input=MISSING_INFO_PROMPT.format(missing_info_field=response.missing))
+        missing_info_response = await ainvoke_llm(llm, MISSING_INFO_PROMPT.format(missing_info_field=missing or response.missing), node="account_info_agent")
         error_msg = AIMessage(content=missing_info_response.content)
         updated_state = {
-            "messages": state["messages"] + [error_msg],
+            "messages": [error_msg],
             "last_agent_response": error_msg.content,
         }
         return Command(goto="__end__", update=updated_state)
@@ -112,23 +129,29 @@ async def account_info_agent(state: OverallState) -> Command[Literal["auth_agent
      
 
 
-    response.provided["token"] = state.get("auth_token")
-    print(response)
-    tool_map = {tool.name: tool for tool in tools}
-    tool_fn = tool_map[response.tool]
-    result = await tool_fn.ainvoke(response.provided)
+    served = {}
+    banking_context = state.get("banking_context")
+    if banking_context:
+        # Served from the session context cache, kept current by the account services and
+        # built by the same query as the real tool: accounts with their recent transactions.
+        served[get_account_info.name] = f"Account info: {banking_context['accounts']}"
+    results = await run_tool_calls(
+        calls, tool_map, state.get("auth_token"), READ_ONLY_TOOLS, served, user_id=_user_id(state),
+    )
 
-    response_msg = AIMessage(content=str(result))
+    response_msg = AIMessage(content=format_tool_results(results))
 
     updated_state = {
-        "messages": state["messages"] + [response_msg]
+        "messages": [response_msg]
     }
 
     return Command(goto="__end__", update=updated_state)
 
 
 
-@traceable(client=client, project_name="bank-bot", name="transaction", run_type="chain")
+@instrument_node("transaction_agent")
+@record_node_events("transaction_agent")
+@traced(name="transaction")
 async def transaction_agent(state: OverallState) -> Command[Literal["auth_agent", "__end__"]]:
     if state.get("current_intent") != "transaction":
         return Command(goto="__end__")
@@ -147,49 +170,50 @@ async def transaction_agent(state: OverallState) -> Command[Literal["auth_agent"
     prompt = TOOL_CALLING_PROMPT.format(
         tool_schemas_json=json.dumps(tool_schemas),
         chat_history=format_conversation(state["messages"]),
+        known_accounts=format_known_accounts(state.get("banking_context")),
         user_input=state["messages"][-1].content
     )
 
     # structured_llm = llm.with_structured_output(FunctionCallPayload)
-    response = await llm.ainvoke([{"role": "user", "content": prompt}])
+    response = await ainvoke_llm(llm, [{"role": "user", "content": prompt}], node="transaction_agent")
     response = FunctionCallPayload.model_validate_json(response.content)
-    print("LLM response:", response)
-    tool_names = [tool.name for tool in tools]
+    logger.debug("LLM tool selection: %s", response)
+    calls = response.planned_calls()
+    tool_map = {tool.name: tool for tool in tools}
+    missing = sorted({field for call in calls for field in call.missing} - {"token"})
 
     if (
-        response.tool is None
-        or response.tool not in tool_names
-        or set(response.missing) - {"token"}
+        not calls
+        or any(call.tool not in tool_map for call in calls)
+        or missing
     ):
-        missing_info_response = await llm.ainvoke(input=MISSING_INFO_PROMPT.format(missing_info_field=response.missing))
+        missing_info_response = await ainvoke_llm(llm, MISSING_INFO_PROMPT.format(missing_info_field=missing or response.missing), node="transaction_agent")
         error_msg = AIMessage(content=missing_info_response.content)
         updated_state = {
-            "messages": state["messages"] + [error_msg],
+            "messages": [error_msg],
         }
         return Command(goto="__end__", update=updated_state)
     
 
 
-    response.provided["token"] = state.get("auth_token")
-    print(response)
-    tool_map = {tool.name: tool for tool in tools}
-    tool_fn = tool_map[response.tool]
-    result = await tool_fn.ainvoke(response.provided)
+    results = await run_tool_calls(calls, tool_map, state.get("auth_token"), READ_ONLY_TOOLS, user_id=_user_id(state))
 
-    response_msg = AIMessage(content=str(result))
+    response_msg = AIMessage(content=format_tool_results(results))
 
 
     updated_state = {
-        "messages": state["messages"] + [response_msg],
+        "messages": [response_msg],
     }
     return Command(goto="__end__", update=updated_state)
 
 
-@traceable(client=client, project_name="bank-bot",name="support", run_type="chain")
+@instrument_node("help_agent")
+@record_node_events("help_agent")
+@traced(name="support")
 async def help_agent(state: OverallState) -> Command[Literal["__end__"]]:
     response = AIMessage(content="How can I assist you? You can ask about your account or transactions.")
     updated_state = {
-        "messages": state["messages"] + [response],
+        "messages": [response],
         "last_agent_response": response.content,
     }
     return Command(goto="__end__", update=updated_state)
@@ -8,17 +8,22 @@ You are given:
 
 CRITICAL RULES:
 - Select the most appropriate tool based on the user's intent.
+- If the request needs several tools (e.g. "show my balance and my last transactions"), add one entry per tool call to "calls", in the order they should run.
 - ONLY include parameters in "provided" if their EXACT values are explicitly stated by the user.
 - NEVER use placeholder values, defaults, or assumptions (like "<unknown>", "null", "n/a", etc.).
 - If a parameter value is not explicitly mentioned, it goes ONLY in "missing", NOT in "provided".
 - NEVER include the parameter "token" in either section - it's handled automatically.
 - A parameter cannot be in both "provided" and "missing" - choose one based on whether you have the actual value.
+- The user's own accounts are listed under KNOWN ACCOUNTS. If the user refers to their own account without a number and exactly one account is known, use that account number as if they had stated it.
 
 
 
 TOOLS (JSON format):
 {tool_schemas_json}
 
+KNOWN ACCOUNTS:
+{known_accounts}
+
 CONVERSATION HISTORY:
 {chat_history}
 
@@ -27,11 +32,15 @@ USER QUERY:
 
 Respond ONLY in this exact JSON format with no additional text:
 {{
-  "tool": "<tool_name_or_none>",
-  "provided": {{
-    "<param_name>": <actual_value_only>
-  }},
-  "missing": ["<param_name_if_not_provided>", ...]
+  "calls": [
+    {{
+      "tool": "<tool_name>",
+      "provided": {{
+        "<param_name>": <actual_value_only>
+      }},
+      "missing": ["<param_name_if_not_provided>", ...]
+    }}
+  ]
 }}
 """
 
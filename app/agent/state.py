@@ -10,7 +10,13 @@ class AuthState(TypedDict, total=False):
     auth_token: Optional[str]
 
 class ConversationState(TypedDict):
+    # Nodes return only the messages they add; add_messages appends them.
     messages: Annotated[List[BaseMessage], add_messages]
 
-class OverallState(AuthState, ConversationState):
-    current_intent: Optional[str]
\ No newline at end of file
+class RoutingState(TypedDict, total=False):
+    # Routing/auth chatter between nodes, kept out of the user-visible transcript.
+    internal_messages: Annotated[List[BaseMessage], add_messages]
+
+class OverallState(AuthState, ConversationState, RoutingState):
+    current_intent: Optional[str]
+    banking_context: Optional[dict]
\ No newline at end of file
@@ -1,10 +1,53 @@
 from langchain.tools import tool
-import httpx
-from typing import Optional
+from langchain_core.tools import InjectedToolArg
+from typing import Annotated, Optional
 from app.core.config import config
+from app.core.http_client import get_http_client
+from app.services.read_cache import ReadCache
 
 API_BASE_URL = config.API_BASE_URL
 
+# Tools without side effects; the agents run these concurrently within a turn.
+READ_ONLY_TOOLS = {"get_account_info", "get_transaction_tool", "list_transactions_by_account_tool"}
+
+
+class ToolRequestFailed(Exception):
+    pass
+
+
+async def cached_get(scope: str | None, field: str, path: str, token: str, ttl: int | None = None, cacheable=None):
+    """
+    GET an API path for a read-only tool, read-through cached under `scope` so a repeat
+    question skips the HTTP hop and the database. Error responses are never cached.
+    """
+    async def load():
+        response = await get_http_client().get(
+            f"{API_BASE_URL}{path}",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code != 200:
+            raise ToolRequestFailed(response.text)
+        return response.json()
+
+    if scope is None:
+        return await load()
+    return await ReadCache.aread_through(scope, field, load, ttl=ttl, cacheable=cacheable)
+
+
+# Filled in by run_tool_calls from the graph state and hidden from the model, so cache
+# scopes never depend on what the model wrote.
+InjectedUserId = Annotated[Optional[str], InjectedToolArg]
+
+
+def user_scope(user_id: str | None, *parts) -> str | None:
+    """
+    Cache scope of the tool results for one user: API responses depend on who asks, so
+    they are never shared across users. None (no caching) without a user id.
+    """
+    if not user_id:
+        return None
+    return ":".join([f"user:{user_id}", *map(str, parts)])
+
 @tool
 async def create_account(name: str, currency: str, account_type: str, balance: float, token: str) -> str:
     """
@@ -12,35 +55,32 @@ async def create_account(name: str, currency: str, account_type: str, balance: f
     Requires: name, currency, account_type, initial balance, and authorization token.
     """
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{API_BASE_URL}/account/create",
-            json={
-                "name": name,
-                "currency": currency,
-                "account_type": account_type,
-                "balance": balance,
-            },
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        if response.status_code == 201:
-            return f"Account created successfully: {response.json()}"
-        return f"Failed to create account: {response.text}"
+    client = get_http_client()
+    response = await client.post(
+        f"{API_BASE_URL}/account/create",
+        json={
+            "name": name,
+            "currency": currency,
+            "account_type": account_type,
+            "balance": balance,
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code == 201:
+        return f"Account created successfully: {response.json()}"
+    return f"Failed to create account: {response.text}"
 
 @tool
-async def get_account_info(token: str) -> str:
+async def get_account_info(token: str, user_id: InjectedUserId = None) -> str:
     """
-    Get account information for the current user.
+    Get information on all of the current user's accounts: balances and recent transactions.
     Requires: authorization token.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{API_BASE_URL}/account/info",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        if response.status_code == 200:
-            return f"Account info: {response.json()}"
-        return f"Failed to retrieve account info: {response.text}"
+    try:
+        accounts = await cached_get(user_scope(user_id), "tool:accounts", "/accounts", token)
+    except ToolRequestFailed as exc:
+        return f"Failed to retrieve account info: {exc}"
+    return f"Account info: {accounts}"
 
 @tool
 async def update_account_info(update_data: dict, token: str) -> str:
@@ -48,15 +88,15 @@ async def update_account_info(update_data: dict, token: str) -> str:
     Update the current user's account information.
     Requires: update fields as a dictionary and authorization token.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.put(
-            f"{API_BASE_URL}/account/update",
-            json=update_data,
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        if response.status_code == 200:
-            return f"Account updated: {response.json()}"
-        return f"Failed to update account: {response.text}"
+    client = get_http_client()
+    response = await client.put(
+        f"{API_BASE_URL}/account/update",
+        json=update_data,
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code == 200:
+        return f"Account updated: {response.json()}"
+    return f"Failed to update account: {response.text}"
 
 @tool
 async def delete_account(token: str) -> str:
@@ -64,14 +104,14 @@ async def delete_account(token: str) -> str:
     Deactivate the current user's account.
     Requires: authorization token.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{API_BASE_URL}/account/delete",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        if response.status_code == 204:
-            return "Account deleted successfully."
-        return f"Failed to delete account: {response.text}"
+    client = get_http_client()
+    response = await client.delete(
+        f"{API_BASE_URL}/account/delete",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code == 204:
+        return "Account deleted successfully."
+    return f"Failed to delete account: {response.text}"
 
 # @tool
 # async def get_account_balance(token: str) -> str:
@@ -95,49 +135,52 @@ async def create_transaction_tool(from_account: str, to_account: str, amount: fl
     """
     Initiate a new transaction between two accounts after balance validation.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{API_BASE_URL}/transactions/create",
-            json={
-                "account_number": from_account,
-                "to_account_number": to_account,
-                "amount": amount
-            },
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        if response.status_code == 201:
-            return f"Transaction successful: {response.json()}"
+    client = get_http_client()
+    response = await client.post(
+        f"{API_BASE_URL}/transactions/create",
+        json={
+            "account_number": from_account,
+            "to_account_number": to_account,
+            "amount": amount
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    if response.status_code != 201:
         return f"Transaction failed: {response.text}"
+    # A rejected transfer is recorded and returned as a FAILED transaction, still a 201.
+    transaction = response.json()
+    if transaction.get("status") != "completed":
+        return f"Transaction failed: {transaction}"
+    return f"Transaction successful: {transaction}"
 
 @tool
-async def get_transaction_tool(transaction_id: str, token: str) -> str:
+async def get_transaction_tool(transaction_id: str, token: str, user_id: InjectedUserId = None) -> str:
     """
     Fetch details of a specific transaction.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{API_BASE_URL}/transactions/{transaction_id}",
-            headers={"Authorization": f"Bearer {token}"}
+    try:
+        transaction = await cached_get(
+            user_scope(user_id, "transaction", transaction_id), "tool:row", f"/transactions/{transaction_id}", token,
+            ttl=config.READ_CACHE_IMMUTABLE_TTL,
+            cacheable=lambda row: row.get("status") != "pending",
         )
-        if response.status_code == 200:
-            return f"Transaction details: {response.json()}"
-        return f"Failed to fetch transaction: {response.text}"
+    except ToolRequestFailed as exc:
+        return f"Failed to fetch transaction: {exc}"
+    return f"Transaction details: {transaction}"
 
 @tool
-async def list_transactions_by_account_tool(account_number: str, token: str) -> str:
+async def list_transactions_by_account_tool(account_number: str, token: str, user_id: InjectedUserId = None) -> str:
     """
     Fetch all transactions for a given account.
     """
 
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{API_BASE_URL}/transactions/account/{account_number}",
-            headers={"Authorization": f"Bearer {token}"}
+    try:
+        transactions = await cached_get(
+            user_scope(user_id), f"tool:transactions:{account_number}", f"/transactions/account/{account_number}", token,
         )
-        if response.status_code == 200:
-            transactions = response.json()
-            return f"Transaction history for account {account_number}:\n{transactions}"
-        return f"Failed to fetch transactions: {response.text}"
+    except ToolRequestFailed as exc:
+        return f"Failed to fetch transactions: {exc}"
+    return f"Transaction history for account {account_number}:\n{transactions}"
     
 
@@ -1,22 +1,82 @@
 from langchain_nvidia_ai_endpoints import ChatNVIDIA
 from langchain_core.rate_limiters import InMemoryRateLimiter
-from langchain.agents import Tool, initialize_agent, AgentType
 from ..core.config import config
-from typing import List
+from ..core.metrics import observe_llm_call
+from ..core.agent_events import record_llm_usage, call_tool
+from contextvars import ContextVar
+import asyncio
+import functools
 import logging
+import time
 from langchain_core.utils.function_calling import convert_to_openai_function
 from typing import List, Dict, Any
 
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mutable holder rather than a float: langchain acquires the rate limiter inside child
+# tasks, which copy the context, so only in-place updates are visible to the caller.
+_rate_limit_wait: ContextVar[list | None] = ContextVar("_rate_limit_wait", default=None)
+
+
+class TimedRateLimiter(InMemoryRateLimiter):
+    """
+    InMemoryRateLimiter that reports how long callers were held back, so LLM latency
+    can be split into queueing and network time.
+    """
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        start = time.perf_counter()
+        try:
+            return super().acquire(blocking=blocking)
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        start = time.perf_counter()
+        try:
+            return await super().aacquire(blocking=blocking)
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+    @staticmethod
+    def _record_wait(elapsed: float):
+        holder = _rate_limit_wait.get()
+        if holder is not None:
+            holder[0] += elapsed
+
+
+async def ainvoke_llm(llm, input, node: str):
+    """
+    Invoke the LLM and record queueing time, network time and token usage for `node`.
+    """
+    holder = [0.0]
+    reset = _rate_limit_wait.set(holder)
+    start = time.perf_counter()
+    try:
+        response = await llm.ainvoke(input)
+    finally:
+        _rate_limit_wait.reset(reset)
+    usage = getattr(response, "usage_metadata", None)
+    observe_llm_call(node, holder[0], time.perf_counter() - start, usage)
+    record_llm_usage(usage)
+    return response
+
+
+@functools.lru_cache(maxsize=1)
 def create_llm():
+    """
+    Return the worker's shared LLM client.
+
+    One instance per process keeps the provider's HTTP connection pool warm and makes the
+    rate limiter actually shared across requests; a fresh limiter per call started with an
+    empty bucket and so delayed every call instead of limiting them.
+    """
     try:
         if not config.NVIDIA_API_KEY:
             raise ValueError("NVIDIA_API_KEY is not set in the environment variables.")
         
-        rate_limiter = InMemoryRateLimiter(
+        rate_limiter = TimedRateLimiter(
             requests_per_second=0.1,
             check_every_n_seconds=0.1,
             max_bucket_size=10,
@@ -26,7 +86,7 @@ def create_llm():
 
         return llm
     except Exception as e:
-        logger.error(f"Error creating LLM: {str(e)}")
+        logger.error("Error creating LLM: %s", e)
         raise
 
 
@@ -42,6 +102,101 @@ def format_conversation(messages: list) -> str:
     return "\n".join(lines)
 
 
+def format_known_accounts(banking_context: dict | None) -> str:
+    if not banking_context or not banking_context.get("accounts"):
+        return "None"
+    return "\n".join(
+        f"- {acc['account_number']} ({acc['account_type']}, {acc['currency']})"
+        for acc in banking_context["accounts"]
+    )
+
+
+# Tools report a rejected request with a result starting like this (see app.agent.tools).
+FAILURE_PREFIXES = ("Failed", "Transaction failed")
+
+
+async def _run_tool_call(tool, inputs: dict) -> tuple[str, str]:
+    try:
+        result = str(await asyncio.wait_for(call_tool(tool, inputs), config.AGENT_TOOL_TIMEOUT))
+    except asyncio.TimeoutError:
+        result = f"{tool.name} timed out after {config.AGENT_TOOL_TIMEOUT:g}s"
+    except Exception as exc:
+        logger.warning("Tool %s failed", tool.name, exc_info=True)
+        result = f"{tool.name} failed: {exc}"
+    return tool.name, result
+
+
+async def _run_write_call(tool, inputs: dict) -> tuple[str, str, bool]:
+    """
+    Run a call with side effects without a deadline: abandoning it would not stop the
+    server from committing it. If it raises, the outcome is unknown and reported as such,
+    so the reply does not invite a retry that could repeat it. Returns (tool, result, ok).
+    """
+    try:
+        result = str(await call_tool(tool, inputs))
+    except Exception:
+        logger.warning("Tool %s failed", tool.name, exc_info=True)
+        return tool.name, (
+            f"{tool.name}: outcome unknown, the request may or may not have been applied. "
+            "Check the account before retrying."
+        ), False
+    return tool.name, result, not result.startswith(FAILURE_PREFIXES)
+
+
+async def _served_result(name: str, result: str) -> tuple[str, str]:
+    return name, result
+
+
+def _tool_inputs(tool, call, token: str | None, user_id: str | None) -> dict:
+    # Set after the model's arguments so it cannot supply its own token or user id.
+    inputs = {**call.provided, "token": token}
+    if "user_id" in tool.args:
+        inputs["user_id"] = user_id
+    return inputs
+
+
+async def run_tool_calls(calls: list, tool_map: dict, token: str | None, read_only: set, served: dict | None = None,
+                         user_id: str | None = None) -> list[tuple[str, str]]:
+    """
+    Run a tool plan of at most AGENT_MAX_TOOL_CALLS calls. Consecutive read-only calls
+    run concurrently, each bounded by AGENT_TOOL_TIMEOUT; a call with side effects runs
+    alone, in plan order, and if it fails the rest of the plan is skipped. `served` maps
+    tool names to results already known (e.g. from the session context) that need no
+    call. Tools that take a `user_id` get the caller's. Returns (tool, result) pairs.
+    """
+    served = served or {}
+    if len(calls) > config.AGENT_MAX_TOOL_CALLS:
+        logger.info("Tool plan of %s calls capped at %s", len(calls), config.AGENT_MAX_TOOL_CALLS)
+        calls = calls[:config.AGENT_MAX_TOOL_CALLS]
+
+    results = []
+    concurrent = []
+    for index, call in enumerate(calls):
+        if call.tool in served:
+            concurrent.append(_served_result(call.tool, served[call.tool]))
+        elif call.tool in read_only:
+            concurrent.append(_run_tool_call(tool_map[call.tool], _tool_inputs(tool_map[call.tool], call, token, user_id)))
+        else:
+            results.extend(await asyncio.gather(*concurrent))
+            concurrent = []
+            name, result, ok = await _run_write_call(tool_map[call.tool], _tool_inputs(tool_map[call.tool], call, token, user_id))
+            results.append((name, result))
+            if not ok:
+                results.extend(
+                    (skipped.tool, "Not run: an earlier step of this request failed.")
+                    for skipped in calls[index + 1:]
+                )
+                return results
+    results.extend(await asyncio.gather(*concurrent))
+    return results
+
+
+def format_tool_results(results: list[tuple[str, str]]) -> str:
+    if len(results) == 1:
+        return results[0][1]
+    return "\n\n".join(f"{name}:\n{result}" for name, result in results)
+
+
 def extract_tool_schemas(tools: List) -> Dict[str, Dict[str, Any]]:
     
     return {
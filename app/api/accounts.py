@@ -2,19 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.models import User, Account
-from app.schemas import AccountInfo, AccountUpdate, AccountCreate
+from app.schemas import AccountInfo, AccountUpdate, AccountCreate, AccountOverview
 from app.services.account_service import AccountService
 from .user import get_current_user
+from app.core.admission import banking_admission
+from app.core.rate_limit import banking_rate_limit
 
-router = APIRouter(prefix="/account", tags=["account"])
+router = APIRouter(prefix="/account", tags=["account"], dependencies=[Depends(banking_rate_limit), Depends(banking_admission)])
+accounts_router = APIRouter(prefix="/accounts", tags=["account"], dependencies=[Depends(banking_rate_limit), Depends(banking_admission)])
 
-@router.get("/info", response_model=AccountInfo, status_code=status.HTTP_200_OK)
-async def get_account_info(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+
+def get_active_account(db: Session, current_user: User) -> Account:
     """
-    Get account information for the current user.
+    The user's first active account, as used by the single-account /account routes.
     """
     if not current_user.is_active:
         raise HTTPException(status_code=401, detail="User is not active")
@@ -26,55 +26,78 @@ async def get_account_info(
 
     if not account:
         raise HTTPException(status_code=404, detail="Active account not found for user")
+    return account
 
-    return AccountService.get_account_details(account.account_id, db)
 
-@router.put("/update", response_model=AccountInfo, status_code=status.HTTP_200_OK)
-async def update_account_info(
-    account_info: AccountUpdate,
+@accounts_router.get("", response_model=list[AccountOverview], status_code=status.HTTP_200_OK)
+def list_accounts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Update account information for the current user.
+    All active accounts of the current user with balances and recent activity.
     """
     if not current_user.is_active:
         raise HTTPException(status_code=401, detail="User is not active")
+    return AccountService.list_accounts_with_activity(current_user.user_id, db)
 
-    account = db.query(Account).filter(
-        Account.user_id == current_user.user_id,
-        Account.is_active == True
-    ).first()
-
-    if not account:
-        raise HTTPException(status_code=404, detail="Active account not found for user")
 
-    return AccountService.update_account_details(account.account_id, account_info.dict(exclude_unset=True), db)
-
-@router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_account_info(
+@accounts_router.get("/{account_number}", response_model=AccountOverview, status_code=status.HTTP_200_OK)
+def get_account(
+    account_number: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Delete (deactivate) account for the current user.
+    One active account of the current user with balance and recent activity.
     """
     if not current_user.is_active:
         raise HTTPException(status_code=401, detail="User is not active")
+    accounts = AccountService.list_accounts_with_activity(current_user.user_id, db, account_number=account_number)
+    if not accounts:
+        raise HTTPException(status_code=404, detail="Active account not found for user")
+    return accounts[0]
 
-    account = db.query(Account).filter(
-        Account.user_id == current_user.user_id,
-        Account.is_active == True
-    ).first()
 
-    if not account:
-        raise HTTPException(status_code=404, detail="Active account not found for user")
+@router.get("/info", response_model=AccountInfo, status_code=status.HTTP_200_OK)
+async def get_account_info(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get account information for the current user.
+    """
+    account = get_active_account(db, current_user)
+    return AccountService.to_dict(account)
 
-    AccountService.close_account(account.account_id, db)
+# Mutating routes are plain def: the services write through to Redis synchronously,
+# which must not block the event loop.
+@router.put("/update", response_model=AccountInfo, status_code=status.HTTP_200_OK)
+def update_account_info(
+    account_info: AccountUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Update account information for the current user.
+    """
+    account = get_active_account(db, current_user)
+    return AccountService.update_account(account, account_info.dict(exclude_unset=True), db)
+
+@router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
+def delete_account_info(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete (deactivate) account for the current user.
+    """
+    account = get_active_account(db, current_user)
+    AccountService.close(account, db)
     return {"detail": "Account deleted successfully"}
 
 @router.post("/create", response_model=AccountInfo, status_code=status.HTTP_201_CREATED)
-async def create_account(
+def create_account(
     account_data: AccountCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1,16 +1,22 @@
-from ..schemas import UserCreate, UserOut, UserLogin
+from ..schemas import UserCreate, UserOut, UserLogin, TokenRefresh, UserLogout
 from app.db.database import get_db
 from app.db.models import User
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.api.user import get_current_user
+from app.core.security import (
+    get_password_hash, verify_password, create_access_token, create_refresh_token,
+    decode_access_token, decode_refresh_token, revoke_token,
+)
+from app.api.user import get_current_user, oauth2_scheme
+from fastapi.security import HTTPAuthorizationCredentials
+from app.core.rate_limit import auth_rate_limit
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
 
-@router.post("/register",status_code=status.HTTP_201_CREATED)
+@router.post("/register",status_code=status.HTTP_201_CREATED, dependencies=[Depends(auth_rate_limit)])
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user.
@@ -32,7 +38,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(auth_rate_limit)])
 def login_user(user: UserLogin, db: Session = Depends(get_db)):
     """
     Login a user and return the user object.
@@ -47,9 +53,55 @@ def login_user(user: UserLogin, db: Session = Depends(get_db)):
         )
     
     access_token = create_access_token(data={"sub": db_user.email})
-    
+    refresh_token = create_refresh_token(data={"sub": db_user.email})
+
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer", "user": db_user}
+
+
+@router.post("/token/refresh", dependencies=[Depends(auth_rate_limit)])
+def refresh_access_token(body: TokenRefresh, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access and refresh token pair, without the
+    password check. Each refresh token works once: it is revoked as it is used, and a
+    replayed one is rejected.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = decode_refresh_token(body.refresh_token)
+    if payload is None or not revoke_token(payload):
+        raise credentials_exception
+
+    db_user = db.query(User).filter(User.email == payload.get("sub")).first()
+    if not db_user or not db_user.is_active:
+        raise credentials_exception
+
+    return {
+        "access_token": create_access_token(data={"sub": db_user.email}),
+        "refresh_token": create_refresh_token(data={"sub": db_user.email}),
+        "token_type": "bearer",
+    }
 
-    return {"access_token": access_token, "token_type": "bearer", "user": db_user}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_user(body: Optional[UserLogout] = None, token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)):
+    """
+    Revoke the bearer access token and, if given, the refresh token.
+    """
+    payload = decode_access_token(token.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    revoke_token(payload)
+    if body and body.refresh_token:
+        refresh = decode_refresh_token(body.refresh_token)
+        if refresh is not None and refresh.get("sub") == payload.get("sub"):
+            revoke_token(refresh)
 
 @router.post("/verify")
 def verify(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
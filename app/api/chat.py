@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from datetime import datetime
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from app.db.models import Message, User, ChatSession
+from app.db.models import Message, User
 from app.db.database import get_db
 import asyncio
 from app.api.user import get_current_user
@@ -11,21 +10,42 @@ from app.api.sessions import get_current_session
 from app.schemas import ChatQuery
 from app.db.schemas import SenderEnum
 from uuid import UUID
+from app.core.config import config
+from app.core.admission import chat_admission
+from app.core.rate_limit import chat_rate_limit
 from app.core.redis_client import redis_client
-from app.agent.graph import multi_agent_graph
-import json
+from app.core.metrics import record_cache
+from app.services.context_service import BankingContextService
+from app.services.message_cache import MessagePageCache
+from app.services.chat_turns import ChatTurnService, TurnGuard
+from app.exceptions import TurnSuperseded
+import orjson
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
 
-async def load_conversation_history(user_id: UUID, session_id: UUID) -> list[BaseMessage]:
+def get_agent_graph():
+    """
+    Import the agent graph (and with it langchain/langgraph) on first use instead of at
+    app import; the startup warm-up calls this before the worker reports ready.
+    """
+    from app.agent.graph import multi_agent_graph
+    return multi_agent_graph
+
+
+async def load_conversation_history(user_id: UUID, session_id: UUID) -> list["BaseMessage"]:
+    from langchain_core.messages import HumanMessage, AIMessage
     redis_key = f"chat:history:{user_id}:{session_id}"
     history_json = await redis_client.get(redis_key)
+    record_cache("chat_history", history_json is not None)
 
     history = []
     if history_json:
-        history_data = json.loads(history_json)
+        history_data = orjson.loads(history_json)
         for msg in history_data:
             if msg["sender"] == "user":
                 history.append(HumanMessage(content=msg["content"]))
@@ -34,7 +54,8 @@ async def load_conversation_history(user_id: UUID, session_id: UUID) -> list[Bas
     return history
 
 
-async def save_conversation_to_redis(user_id: UUID, session_id: UUID, history: list[BaseMessage]):
+async def save_conversation_to_redis(user_id: UUID, session_id: UUID, history: list["BaseMessage"]):
+    from langchain_core.messages import HumanMessage
     redis_key = f"chat:history:{user_id}:{session_id}"
     history_data = []
     for msg in history:
@@ -42,30 +63,31 @@ async def save_conversation_to_redis(user_id: UUID, session_id: UUID, history: l
             "sender": "user" if isinstance(msg, HumanMessage) else "bot",
             "content": msg.content,
         })
-    await redis_client.set(redis_key, json.dumps(history_data))
+    # Outlives the idle window so the reaper, not expiry, normally ends the session.
+    await redis_client.set(redis_key, orjson.dumps(history_data), ex=config.SESSION_IDLE_TIMEOUT * 2)
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-async def chat_endpoint(
-    chat_query: ChatQuery,
-    session: ChatSession = Depends(get_current_session),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):  
-    query = chat_query.query
-    if not query:
-        raise HTTPException(status_code=400, detail="Query cannot be empty")
-
+async def run_turn(guard: TurnGuard, query: str, session_id: UUID, db: Session, current_user: User) -> dict:
+    """
+    One chat turn under the session's turn lock: run the graph on the stored history,
+    then persist the exchange to the database and Redis.
+    """
+    from langchain_core.messages import HumanMessage
 
     key = f"user:{current_user.user_id}:auth_token"
     token = await redis_client.get(key)
 
 
-    conversation_history = await load_conversation_history(current_user.user_id, session.session_id)
+    conversation_history = await load_conversation_history(current_user.user_id, session_id)
 
 
     conversation_history.append(HumanMessage(content=query))
 
+    banking_context = await BankingContextService.get(current_user.user_id)
+    record_cache("banking_context", banking_context is not None)
+    if banking_context is None:
+        banking_context = await asyncio.to_thread(BankingContextService.refresh, current_user.user_id, db)
+
 
     state = {
         "messages": conversation_history,
@@ -74,19 +96,21 @@ async def chat_endpoint(
         "reauth_required": False,
         "auth_token": token,
         "current_intent": None,
+        "banking_context": banking_context,
     }
 
 
-    result = await multi_agent_graph.ainvoke(
+    # The LLM work is the expensive part: a newer message for the session cancels it.
+    result = await guard.cancellable(get_agent_graph().ainvoke(
         state,
         config={
             "configurable": {
                 "user_id": current_user.user_id,
-                "session_id": str(session.session_id),
+                "session_id": str(session_id),
                 "thread_id": "bankbot"
             }
         },
-    )
+    ))
 
 
     ai_response = None
@@ -96,7 +120,7 @@ async def chat_endpoint(
     
     def save_messages():
         user_msg = Message(
-            session_id=session.session_id,
+            session_id=session_id,
             content=query,
             sender=SenderEnum.user,
             timestamp=datetime.utcnow(),
@@ -106,7 +130,7 @@ async def chat_endpoint(
         ai_msg = None
         if ai_response:
             ai_msg = Message(
-                session_id=session.session_id,
+                session_id=session_id,
                 content=ai_response,
                 sender=SenderEnum.bot,
                 timestamp=datetime.utcnow(),
@@ -121,11 +145,51 @@ async def chat_endpoint(
         return user_msg, ai_msg
 
     user_msg, ai_msg = await asyncio.to_thread(save_messages)
+    await MessagePageCache.invalidate(session_id)
 
 
-    await save_conversation_to_redis(current_user.user_id, session.session_id, result["messages"])
+    await save_conversation_to_redis(current_user.user_id, session_id, result["messages"])
 
     return {
         "user_message_id": user_msg.message_id,
         "ai_response": ai_response,
     }
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(chat_rate_limit), Depends(chat_admission)])
+async def chat_endpoint(
+    chat_query: ChatQuery,
+    session_id: UUID = Depends(get_current_session),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Admission control runs first, so an overloaded worker sheds the request before any
+    DB or LLM work. Turns of a session run one at a time across workers. A duplicate of a message still
+    in flight, or answered within the coalescing window, shares its result; a turn superseded by a newer message
+    is cancelled and answered with 409.
+    """
+    query = chat_query.query
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    fingerprint = ChatTurnService.fingerprint(query)
+    turn = await ChatTurnService.claim(session_id, fingerprint)
+    if turn is None:
+        result = await ChatTurnService.wait_for_result(session_id, fingerprint)
+        if result is None:
+            raise HTTPException(status_code=409, detail="An identical message for this session did not complete")
+        return result
+
+    try:
+        async with ChatTurnService.serialized(session_id, turn, fingerprint) as guard:
+            result = await run_turn(guard, query, session_id, db, current_user)
+    except TurnSuperseded:
+        await ChatTurnService.abandon(session_id, fingerprint)
+        raise HTTPException(status_code=409, detail="Superseded by a newer message")
+    except Exception:
+        await ChatTurnService.abandon(session_id, fingerprint)
+        raise
+
+    await ChatTurnService.publish_result(session_id, fingerprint, result)
+    return result
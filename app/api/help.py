@@ -18,14 +18,14 @@ def create_fallback_help_request(
     help_input: FallbackHelpRequestInput,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    session: ChatSession = Depends(get_current_session),
+    session_id: UUID = Depends(get_current_session),
 ):
     """
     Create a support request for the current user and session.
     """
     help_request = FallbackHelpRequest(
         user_id=current_user.user_id,
-        session_id=session.session_id,
+        session_id=session_id,
         notes=help_input.notes
     )
     db.add(help_request)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Expose Prometheus metrics for this worker.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
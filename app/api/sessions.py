@@ -1,31 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query, Header
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session as DBSession
 from datetime import datetime
 from uuid import UUID
-from typing import List
+from typing import List, Optional, Annotated
+import asyncio
+import hashlib
 from app.db.database import get_db
-from app.db.models import ChatSession as SessionModel, User,Message
+from app.db.models import ChatSession as SessionModel, User,Message, AgentEvent
 from app.schemas import SessionOut
 from app.db.schemas import SenderEnum
 from app.api.user import get_current_user
+from app.core.logging import bind_log_context
+from app.services.context_service import BankingContextService
+from app.services.message_cache import MessagePageCache
+from app.services.session_service import ActiveSessionService
+from app.core.rate_limit import sessions_rate_limit
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_time_cursor
 
-router = APIRouter(prefix="/sessions", tags=["Sessions"])
+router = APIRouter(prefix="/sessions", tags=["Sessions"], dependencies=[Depends(sessions_rate_limit)])
 
 
-def get_current_session(current_user: User = Depends(get_current_user), db: DBSession = Depends(get_db)) -> UUID:
+async def get_current_session(current_user: User = Depends(get_current_user), db: DBSession = Depends(get_db)) -> UUID:
     """
-    Retrieve the current active session ID for the user.
+    Retrieve the current active session ID for the user from the Redis pointer, falling
+    back to the database (and re-publishing the pointer) on a miss.
     If no active session exists, raise an HTTPException.
     """
-    session = db.query(SessionModel).filter_by(
-        user_id=current_user.user_id,
-        is_active=True
-    ).first()
+    session_id = await ActiveSessionService.get(current_user.user_id)
+    if session_id is None:
+        session_id = await asyncio.to_thread(ActiveSessionService.load, current_user.user_id, db)
 
-    if not session:
+    if session_id is None:
         raise HTTPException(status_code=404, detail="No active session found.")
 
-    return session
+    bind_log_context(session_id=session_id)
+    return session_id
 
 @router.post("/initialize", response_model=SessionOut, status_code=status.HTTP_201_CREATED)
 def initialize_new_session(
@@ -34,20 +44,12 @@ def initialize_new_session(
 ):
     """
     Starts a new session whenever the user opens the bot.
-    All previous sessions are marked as ended.
+    The previous session is ended in the same transaction.
     """
-    db.query(SessionModel).filter(
-        SessionModel.user_id == current_user.user_id,
-        SessionModel.is_active == True
-    ).update({
-        "is_active": False,
-        "ended_at": datetime.utcnow()
-    })
-
-    new_session = SessionModel(user_id=current_user.user_id)
-    db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    new_session = ActiveSessionService.start(current_user.user_id, db)
+
+    # Prefetch the accounts/recent activity the agent will ask about during this session.
+    BankingContextService.refresh(current_user.user_id, db)
 
     return new_session
 
@@ -72,22 +74,58 @@ def get_active_session(
 
 @router.get("/history", response_model=List[SessionOut])
 def get_user_sessions(
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    before: Optional[str] = None,
     db: DBSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all past sessions of the user.
+    List past sessions of the user, newest first.
+    Paginated by keyset: pass the X-Next-Cursor header of a page as `before` for the next one.
     """
-    sessions = db.query(SessionModel).filter(
-        SessionModel.user_id == current_user.user_id
-    ).order_by(SessionModel.started_at.desc()).all()
-    return sessions
+    query = db.query(
+        SessionModel.session_id,
+        SessionModel.user_id,
+        SessionModel.started_at,
+        SessionModel.ended_at,
+        SessionModel.is_active,
+    ).filter(SessionModel.user_id == current_user.user_id)
+
+    if before:
+        cursor = decode_time_cursor(before)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(
+            tuple_(SessionModel.started_at, SessionModel.session_id) < cursor
+        )
+
+    rows = query.order_by(SessionModel.started_at.desc(), SessionModel.session_id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].started_at.isoformat(), rows[-1].session_id)
+    return [row._asdict() for row in rows]
 
 @router.get("/messages/{session_id}", response_model=list[dict])
-def get_messages(session_id: str, db: DBSession = Depends(get_db),
+def get_messages(session_id: str, response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    db: DBSession = Depends(get_db),
     current_user: User = Depends(get_current_user)):
-    
-    session = db.query(SessionModel).filter(
+    """
+    Messages of a session in chronological order, paginated by keyset: pass the
+    X-Next-Cursor header of a page as `after` for the next one.
+
+    Pages of ended sessions never change, so they carry an ETag and answer a matching
+    If-None-Match with 304. Pages of the active session are cached in Redis until the
+    next chat message.
+    """
+    session = db.query(
+        SessionModel.started_at,
+        SessionModel.ended_at,
+        SessionModel.is_active,
+    ).filter(
         SessionModel.session_id == session_id,
         SessionModel.user_id == current_user.user_id
     ).first()
@@ -95,18 +133,97 @@ def get_messages(session_id: str, db: DBSession = Depends(get_db),
     if not session:
         raise HTTPException(status_code=403, detail="Session does not belong to the current user or does not exist.")
 
-    messages = db.query(Message).filter(Message.session_id == session_id).order_by(Message.timestamp).all()
-    if not messages:
+    page_key = f"{after}:{limit}"
+    generation = None
+    if not session.is_active:
+        digest = hashlib.sha1(f"{session_id}:{session.ended_at}:{page_key}".encode()).hexdigest()
+        etag = f'"{digest}"'
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, max-age=86400"
+    else:
+        cached, generation = MessagePageCache.get(session_id, page_key)
+        if cached is not None:
+            if cached["next_cursor"]:
+                response.headers["X-Next-Cursor"] = cached["next_cursor"]
+            return cached["messages"]
+
+    # Bounding by the session's lifetime lets Postgres prune to the partitions it spans.
+    query = db.query(Message.message_id, Message.sender, Message.content, Message.timestamp).filter(
+        Message.session_id == session_id,
+        Message.timestamp >= (session.started_at or datetime.min),
+        Message.timestamp <= (session.ended_at or datetime.utcnow()),
+    )
+    if after:
+        cursor = decode_time_cursor(after)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(
+            tuple_(Message.timestamp, Message.message_id) > cursor
+        )
+
+    rows = query.order_by(Message.timestamp, Message.message_id).limit(limit + 1).all()
+    if not rows and not after:
         raise HTTPException(status_code=404, detail="No messages found for the given session ID")
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp.isoformat(), rows[-1].message_id)
+        response.headers["X-Next-Cursor"] = next_cursor
+
     formatted_messages = [
-        {"role": "user" if msg.sender == SenderEnum.user else "bot", "text": msg.content}
-        for msg in messages
+        {"role": "user" if row.sender == SenderEnum.user else "bot", "text": row.content}
+        for row in rows
     ]
 
+    if session.is_active:
+        MessagePageCache.set(session_id, page_key, {"messages": formatted_messages, "next_cursor": next_cursor}, generation)
+
     return formatted_messages
 
 
+@router.get("/{session_id}/events", response_model=list[dict])
+def get_session_events(session_id: str, response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    db: DBSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)):
+    """
+    Agent event timeline of a session (node starts/completions/failures with timings,
+    token usage and tool calls), oldest first. Paginated like /messages. Events are
+    written in batches, so the last second or so of an active session may be missing.
+    """
+    owned = db.query(SessionModel.session_id).filter(
+        SessionModel.session_id == session_id,
+        SessionModel.user_id == current_user.user_id
+    ).first()
+    if not owned:
+        raise HTTPException(status_code=403, detail="Session does not belong to the current user or does not exist.")
+
+    query = db.query(
+        AgentEvent.event_id,
+        AgentEvent.agent_name,
+        AgentEvent.event_type,
+        AgentEvent.payload,
+        AgentEvent.created_at,
+    ).filter(AgentEvent.session_id == session_id)
+    if after:
+        cursor = decode_time_cursor(after)
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(
+            tuple_(AgentEvent.created_at, AgentEvent.event_id) > cursor
+        )
+
+    rows = query.order_by(AgentEvent.created_at, AgentEvent.event_id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].event_id)
+    return [row._asdict() for row in rows]
+
+
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
@@ -126,4 +243,8 @@ async def delete_session(
     db.delete(session)
     db.commit()
 
+    # A deleted active session must stop resolving for /chat and /support.
+    await asyncio.to_thread(ActiveSessionService.clear, current_user.user_id, session.session_id)
+    await MessagePageCache.invalidate(session.session_id)
+
     return
\ No newline at end of file
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 from app.db.database import get_db
 from app.schemas import TransactionCreate, TransactionOut
 from app.services.transaction_service import TransactionService
 from app.db.models import User
 from app.api.user import get_current_user
+from app.core.admission import banking_admission
+from app.core.rate_limit import banking_rate_limit
 
-router = APIRouter(prefix="/transactions", tags=["Transactions"])
+router = APIRouter(prefix="/transactions", tags=["Transactions"], dependencies=[Depends(banking_rate_limit), Depends(banking_admission)])
 
 
 @router.post("/create", response_model=TransactionOut, status_code=status.HTTP_201_CREATED)
@@ -23,14 +28,23 @@ def create_transaction(transaction_data: TransactionCreate, db: Session = Depend
 @router.get("/{transaction_id}", response_model=TransactionOut)
 def get_transaction(transaction_id: str, db: Session = Depends(get_db),current_user: User = Depends(get_current_user),):
     """
-    Fetch details of a specific transaction.
+    Fetch details of one of the current user's transactions.
     """
-    return TransactionService.get_transaction_by_id(transaction_id, db)
+    try:
+        return TransactionService.get_transaction_row(transaction_id, current_user.user_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.get("/account/{account_number}", response_model=list[TransactionOut])
-def get_transactions_by_account(account_number: str, db: Session = Depends(get_db),current_user: User = Depends(get_current_user),):
+def get_transactions_by_account(account_number: str, since: Optional[datetime] = None, until: Optional[datetime] = None, db: Session = Depends(get_db),current_user: User = Depends(get_current_user),):
     """
-    Fetch all transactions for a given account.
+    Fetch all transactions for one of the current user's accounts, optionally limited to
+    [since, until). Rows are serialized straight to JSON; the response_model only
+    documents the shape.
     """
-    return TransactionService.list_transactions_by_account(account_number, db)
+    try:
+        rows = TransactionService.list_transaction_rows(account_number, current_user.user_id, db, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return ORJSONResponse(content=rows)
@@ -6,6 +6,7 @@ from app.core.security import decode_access_token
 from app.db.models import User
 from fastapi import APIRouter
 from app.core.redis_client import redis_client
+from app.core.logging import bind_log_context
 
 oauth2_scheme = HTTPBearer()
 
@@ -21,10 +22,10 @@ async def get_current_user(token: HTTPAuthorizationCredentials = Depends(oauth2_
         raise credentials_exception
     
 
+    bind_log_context(user_id=user.user_id)
+
     key = f"user:{user.user_id}:auth_token"
     await  redis_client.set(key, token.credentials, ex=1800)
-    if await  redis_client.exists(key):
-        print("Token is stored in Redis.")
     return user
 
 
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from app.core.config import config
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Global slots are leases in a sorted set scored by expiry, so slots held by a crashed
+# worker free themselves.
+_ACQUIRE_GLOBAL = redis_client.register_script("""
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+return 1
+""")
+
+
+class AdmissionPool:
+    """
+    Admission control for a class of routes, used as a FastAPI dependency.
+
+    A request first waits for one of `concurrency` per-worker slots, for at most
+    `deadline` seconds and only if fewer than `max_queue` requests are already waiting;
+    with `global_limit` set it then also needs one of that many slots across all workers.
+    Anything over budget is rejected up front with 429 and a Retry-After estimated from
+    recent service times, instead of timing out after its work has been done.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, deadline: float, global_limit: int = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.global_limit = global_limit
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._waiting = 0
+        self._avg_service = 1.0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._avg_service * (self._waiting + 1) / self.concurrency))
+
+    def _shed(self, reason: str) -> HTTPException:
+        ADMISSION_SHED.labels(pool=self.name, reason=reason).inc()
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server busy, retry later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def _acquire_global(self, token: str) -> bool:
+        now_ms = int(time.time() * 1000)
+        lease_ms = int(config.ADMISSION_LEASE_SECONDS * 1000)
+        try:
+            return bool(await _ACQUIRE_GLOBAL(
+                keys=[f"admission:{self.name}"],
+                args=[now_ms, now_ms + lease_ms, self.global_limit, token, lease_ms],
+            ))
+        except RedisError:
+            # Fail open: the per-worker limit still applies.
+            logger.warning("Global admission check for %s failed", self.name, exc_info=True)
+            return True
+
+    async def _release_global(self, token: str):
+        try:
+            await redis_client.zrem(f"admission:{self.name}", token)
+        except RedisError:
+            logger.warning("Could not release global admission slot for %s", self.name, exc_info=True)
+
+    async def __call__(self):
+        if self._waiting >= self.max_queue:
+            raise self._shed("queue_full")
+
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(pool=self.name).inc()
+        queued = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.deadline)
+        except asyncio.TimeoutError:
+            raise self._shed("deadline")
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(pool=self.name).dec()
+        ADMISSION_WAIT.labels(pool=self.name).observe(time.perf_counter() - queued)
+
+        token = uuid.uuid4().hex if self.global_limit else None
+        try:
+            if token and not await self._acquire_global(token):
+                token = None
+                raise self._shed("global_limit")
+            ADMISSION_IN_FLIGHT.labels(pool=self.name).inc()
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                ADMISSION_IN_FLIGHT.labels(pool=self.name).dec()
+                self._avg_service = 0.9 * self._avg_service + 0.1 * (time.perf_counter() - started)
+        finally:
+            if token:
+                await self._release_global(token)
+            self._semaphore.release()
+
+
+# Separate pools, so a burst of chat turns (which themselves call the banking routes
+# through the agent tools) can neither starve nor deadlock the cheap routes.
+chat_admission = AdmissionPool(
+    "chat",
+    concurrency=config.ADMISSION_CHAT_CONCURRENCY,
+    max_queue=config.ADMISSION_CHAT_QUEUE,
+    deadline=config.ADMISSION_CHAT_DEADLINE,
+    global_limit=config.ADMISSION_CHAT_GLOBAL_LIMIT,
+)
+banking_admission = AdmissionPool(
+    "banking",
+    concurrency=config.ADMISSION_BANKING_CONCURRENCY,
+    max_queue=config.ADMISSION_BANKING_QUEUE,
+    deadline=config.ADMISSION_BANKING_DEADLINE,
+)
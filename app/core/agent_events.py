@@ -0,0 +1,220 @@
+import asyncio
+import functools
+import logging
+import time
+import zlib
+from contextvars import ContextVar
+from datetime import datetime
+from uuid import UUID
+
+from langgraph.config import get_config
+
+from app.core.config import config
+from app.core.logging import redact
+from app.core.metrics import AGENT_EVENTS_DROPPED, AGENT_EVENTS_WRITTEN, observe_tool
+from app.core.tracing import summarize
+from app.db.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_KEYS = {"token", "auth_token", "password"}
+
+# The node currently running and the token usage of its LLM calls. A mutable holder, as
+# with app.agent.utils._rate_limit_wait: LLM calls run in child tasks with copied contexts.
+_node_run: ContextVar[dict | None] = ContextVar("_node_run", default=None)
+
+
+def _scrub(value):
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, dict):
+        return {k: "[REDACTED]" if k in SENSITIVE_KEYS else _scrub(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scrub(v) for v in value]
+    return value
+
+
+def _session_sampled(session_id: str) -> bool:
+    """
+    Sample whole sessions (not single events) so every kept timeline is complete.
+    """
+    rate = config.AGENT_EVENTS_SAMPLE_RATE
+    return rate >= 1 or zlib.crc32(session_id.encode()) / 2**32 < rate
+
+
+def _configured_session_id() -> str | None:
+    """
+    `configurable.session_id` of the graph run this is called from, if any.
+    """
+    try:
+        return get_config().get("configurable", {}).get("session_id")
+    except RuntimeError:  # not inside a graph run
+        return None
+
+
+def _recording_session(failed: bool = False) -> str | None:
+    if not config.AGENT_EVENTS_ENABLED:
+        return None
+    run = _node_run.get()
+    session_id = run["session_id"] if run else _configured_session_id()
+    if session_id is None or not (failed or _session_sampled(session_id)):
+        return None
+    return session_id
+
+
+class AgentEventWriter:
+    """
+    Bounded, non-blocking writer for agent_events.
+
+    `submit` never waits: when the queue is full the event is dropped and counted. A
+    lifespan task drains the queue and writes each batch as one multi-row INSERT in a
+    worker thread, so the request path never pays database latency for its events.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def submit(self, event: dict):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            AGENT_EVENTS_DROPPED.labels(reason="queue_full").inc()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+
+    async def flush(self):
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        for offset in range(0, len(batch), self.batch_size):
+            await self._write(batch[offset:offset + self.batch_size])
+
+    async def _write(self, batch: list[dict]):
+        try:
+            await asyncio.to_thread(write_events, batch)
+            AGENT_EVENTS_WRITTEN.inc(len(batch))
+        except Exception:
+            AGENT_EVENTS_DROPPED.labels(reason="write_error").inc(len(batch))
+            logger.warning("Could not write %s agent events", len(batch), exc_info=True)
+
+
+def write_events(batch: list[dict]):
+    from sqlalchemy import insert
+    from app.db.database import engine
+    from app.db.models import AgentEvent
+    with engine.begin() as conn:
+        conn.execute(insert(AgentEvent), batch)
+
+
+agent_event_writer = AgentEventWriter(
+    max_queue=config.AGENT_EVENTS_QUEUE_SIZE,
+    batch_size=config.AGENT_EVENTS_BATCH_SIZE,
+    flush_interval=config.AGENT_EVENTS_FLUSH_INTERVAL,
+)
+
+
+def emit(session_id: str, agent_name: str, event_type: str, payload: dict):
+    agent_event_writer.submit({
+        "event_id": uuid7(),
+        "session_id": UUID(session_id),
+        "agent_name": agent_name,
+        "event_type": event_type,
+        "payload": _scrub(summarize(payload)),
+        "created_at": datetime.utcnow(),
+    })
+
+
+def record_llm_usage(usage: dict | None):
+    """
+    Add an LLM call's token usage to the running node's COMPLETED/FAILED event.
+    """
+    run = _node_run.get()
+    if run is None or not usage:
+        return
+    for kind in ("input_tokens", "output_tokens", "total_tokens"):
+        run["usage"][kind] = run["usage"].get(kind, 0) + (usage.get(kind) or 0)
+
+
+def record_node_events(name: str):
+    """
+    Emit STARTED, then COMPLETED or FAILED (with duration and token usage) for an async
+    graph node into the session's event timeline.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(state, *args, **kwargs):
+            run = {"node": name, "usage": {}, "session_id": _configured_session_id()}
+            reset = _node_run.set(run)
+            session_id = _recording_session()
+            if session_id:
+                emit(session_id, name, "STARTED", {"intent": state.get("current_intent")})
+            start = time.perf_counter()
+            try:
+                result = await fn(state, *args, **kwargs)
+            except Exception as exc:
+                session_id = _recording_session(failed=True)
+                if session_id:
+                    emit(session_id, name, "FAILED", {
+                        "duration_ms": (time.perf_counter() - start) * 1000,
+                        "usage": run["usage"],
+                        "error": repr(exc),
+                    })
+                raise
+            finally:
+                _node_run.reset(reset)
+            if session_id:
+                emit(session_id, name, "COMPLETED", {
+                    "duration_ms": (time.perf_counter() - start) * 1000,
+                    "usage": run["usage"],
+                    "goto": getattr(result, "goto", None),
+                })
+            return result
+        return wrapper
+    return decorator
+
+
+async def call_tool(tool, inputs: dict):
+    """
+    Invoke a tool with metrics, recording its (redacted) inputs and output as a
+    TOOL_COMPLETED or TOOL_FAILED event of the running node.
+    """
+    run = _node_run.get()
+    node = run["node"] if run else tool.name
+    start = time.perf_counter()
+    try:
+        with observe_tool(tool.name):
+            result = await tool.ainvoke(inputs)
+    except Exception as exc:
+        session_id = _recording_session(failed=True)
+        if session_id:
+            emit(session_id, node, "TOOL_FAILED", {
+                "tool": tool.name,
+                "inputs": inputs,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "error": repr(exc),
+            })
+        raise
+    session_id = _recording_session()
+    if session_id:
+        emit(session_id, node, "TOOL_COMPLETED", {
+            "tool": tool.name,
+            "inputs": inputs,
+            "output": result,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+        })
+    return result
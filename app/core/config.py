@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
@@ -12,9 +14,87 @@ class Config(BaseSettings):
     LANGSMITH_TRACING: str = Field("true", env="LANGSMITH_TRACING")
     LANGSMITH_ENDPOINT: str = Field("https://api.smith.langchain.com", env="LANGSMITH_ENDPOINT")
     LANGSMITH_PROJECT: str = Field("bank-bot", env="LANGSMITH_PROJECT")
+    # Head sampling rate for node traces; "false" in LANGSMITH_TRACING disables tracing entirely.
+    LANGSMITH_SAMPLE_RATE: float = Field(1.0, env="LANGSMITH_SAMPLE_RATE")
+    TRACE_TAIL_LATENCY_MS: float = Field(5000, env="TRACE_TAIL_LATENCY_MS")
+    TRACE_SINKS: str = Field("langsmith", env="TRACE_SINKS")  # comma separated: langsmith, file
+    TRACE_FILE_DIR: str = Field("traces", env="TRACE_FILE_DIR")
+    TRACE_QUEUE_SIZE: int = Field(1000, env="TRACE_QUEUE_SIZE")
+    TRACE_BATCH_SIZE: int = Field(100, env="TRACE_BATCH_SIZE")
+    TRACE_FLUSH_INTERVAL: float = Field(2.0, env="TRACE_FLUSH_INTERVAL")
+    OTEL_ENABLED: bool = Field(False, env="OTEL_ENABLED")
+    OTEL_SERVICE_NAME: str = Field("bank-bot", env="OTEL_SERVICE_NAME")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
-    ALGORITHM: str = Field("HS256", env="ALGORITHM")
+    ALGORITHM: str = Field("HS256", env="ALGORITHM")  # HS*, or RS*/ES*/PS* with the key files below
+    JWT_PRIVATE_KEY_FILE: str = Field("", env="JWT_PRIVATE_KEY_FILE")  # PEM, signs tokens
+    JWT_PUBLIC_KEY_FILE: str = Field("", env="JWT_PUBLIC_KEY_FILE")  # PEM, verifies tokens
+    REFRESH_TOKEN_EXPIRE_DAYS: int = Field(14, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    TOKEN_CACHE_SIZE: int = Field(10_000, env="TOKEN_CACHE_SIZE")  # verified tokens per worker
+    TOKEN_REVOCATION_CAPACITY: int = Field(100_000, env="TOKEN_REVOCATION_CAPACITY")  # Bloom filter sizing
+    TOKEN_REVOCATION_ERROR_RATE: float = Field(0.001, env="TOKEN_REVOCATION_ERROR_RATE")
+    TOKEN_REVOCATION_REFRESH_INTERVAL: int = Field(300, env="TOKEN_REVOCATION_REFRESH_INTERVAL")
     API_BASE_URL: str = Field("http://localhost:8000", env="API_BASE_URL")
+    STARTUP_WARMUP: bool = Field(True, env="STARTUP_WARMUP")
+    WARMUP_AGENT: bool = Field(True, env="WARMUP_AGENT")  # False keeps agent imports lazy until the first /chat
+    PARTITION_MONTHS_AHEAD: int = Field(3, env="PARTITION_MONTHS_AHEAD")
+    PARTITION_MAINTENANCE_INTERVAL: int = Field(6 * 3600, env="PARTITION_MAINTENANCE_INTERVAL")
+    PARTITION_ARCHIVE_DIR: str = Field("archive", env="PARTITION_ARCHIVE_DIR")  # shared volume, or staging for the bucket
+    PARTITION_ARCHIVE_BUCKET: str = Field("", env="PARTITION_ARCHIVE_BUCKET")  # S3 bucket for archives (needs boto3)
+    MESSAGES_RETENTION_MONTHS: int = Field(24, env="MESSAGES_RETENTION_MONTHS")
+    TRANSACTIONS_RETENTION_MONTHS: int = Field(84, env="TRANSACTIONS_RETENTION_MONTHS")
+    AGENT_EVENTS_ENABLED: bool = Field(True, env="AGENT_EVENTS_ENABLED")
+    AGENT_EVENTS_SAMPLE_RATE: float = Field(1.0, env="AGENT_EVENTS_SAMPLE_RATE")  # share of sessions; failures always kept
+    AGENT_EVENTS_QUEUE_SIZE: int = Field(5000, env="AGENT_EVENTS_QUEUE_SIZE")
+    AGENT_EVENTS_BATCH_SIZE: int = Field(500, env="AGENT_EVENTS_BATCH_SIZE")
+    AGENT_EVENTS_FLUSH_INTERVAL: float = Field(1.0, env="AGENT_EVENTS_FLUSH_INTERVAL")
+    CHAT_TURN_LOCK_TTL: float = Field(30.0, env="CHAT_TURN_LOCK_TTL")  # renewed while the turn runs
+    CHAT_TURN_WAIT_TIMEOUT: float = Field(60.0, env="CHAT_TURN_WAIT_TIMEOUT")
+    CHAT_TURN_POLL_INTERVAL: float = Field(0.2, env="CHAT_TURN_POLL_INTERVAL")
+    CHAT_COALESCE_WINDOW: int = Field(10, env="CHAT_COALESCE_WINDOW")  # seconds an answered message shares its result
+    ADMISSION_CHAT_CONCURRENCY: int = Field(8, env="ADMISSION_CHAT_CONCURRENCY")  # per worker
+    ADMISSION_CHAT_QUEUE: int = Field(32, env="ADMISSION_CHAT_QUEUE")
+    ADMISSION_CHAT_DEADLINE: float = Field(10.0, env="ADMISSION_CHAT_DEADLINE")  # max seconds queued
+    ADMISSION_CHAT_GLOBAL_LIMIT: int = Field(64, env="ADMISSION_CHAT_GLOBAL_LIMIT")  # across workers, 0 = off
+    ADMISSION_BANKING_CONCURRENCY: int = Field(32, env="ADMISSION_BANKING_CONCURRENCY")
+    ADMISSION_BANKING_QUEUE: int = Field(128, env="ADMISSION_BANKING_QUEUE")
+    ADMISSION_BANKING_DEADLINE: float = Field(2.0, env="ADMISSION_BANKING_DEADLINE")
+    ADMISSION_LEASE_SECONDS: float = Field(120.0, env="ADMISSION_LEASE_SECONDS")
+    RATE_LIMIT_AUTH: str = Field("10/60", env="RATE_LIMIT_AUTH")  # requests/seconds per IP
+    RATE_LIMIT_CHAT: str = Field("20/60", env="RATE_LIMIT_CHAT")  # requests/seconds per user
+    RATE_LIMIT_BANKING: str = Field("300/60", env="RATE_LIMIT_BANKING")
+    RATE_LIMIT_SESSIONS: str = Field("120/60", env="RATE_LIMIT_SESSIONS")
+    AGENT_MAX_TOOL_CALLS: int = Field(4, env="AGENT_MAX_TOOL_CALLS")  # per agent turn
+    AGENT_TOOL_TIMEOUT: float = Field(10.0, env="AGENT_TOOL_TIMEOUT")  # seconds per read-only tool call; writes are not abandoned
+    READ_CACHE_ENABLED: bool = Field(True, env="READ_CACHE_ENABLED")
+    READ_CACHE_TTL: int = Field(300, env="READ_CACHE_TTL")  # Redis tier, dropped early on mutation
+    READ_CACHE_IMMUTABLE_TTL: int = Field(86400, env="READ_CACHE_IMMUTABLE_TTL")  # completed/failed transactions
+    READ_CACHE_LOCAL_TTL: float = Field(30.0, env="READ_CACHE_LOCAL_TTL")  # in-process tier
+    READ_CACHE_LOCAL_SIZE: int = Field(2048, env="READ_CACHE_LOCAL_SIZE")  # scopes per worker
+    OUTBOX_STREAM: str = Field("banking:events", env="OUTBOX_STREAM")
+    OUTBOX_STREAM_MAXLEN: int = Field(100_000, env="OUTBOX_STREAM_MAXLEN")  # approximate trim
+    OUTBOX_CONSUMER_GROUPS: str = Field("notifications,analytics,fraud", env="OUTBOX_CONSUMER_GROUPS")  # comma separated
+    OUTBOX_BATCH_SIZE: int = Field(200, env="OUTBOX_BATCH_SIZE")
+    OUTBOX_POLL_INTERVAL: float = Field(0.5, env="OUTBOX_POLL_INTERVAL")
+    OUTBOX_RETENTION_HOURS: int = Field(72, env="OUTBOX_RETENTION_HOURS")  # published rows kept for replay
+    OUTBOX_CLAIM_IDLE: float = Field(60.0, env="OUTBOX_CLAIM_IDLE")  # seconds before a stuck entry is redelivered
+    RISK_CHECKS_ENABLED: bool = Field(True, env="RISK_CHECKS_ENABLED")
+    RISK_FAIL_OPEN: bool = Field(True, env="RISK_FAIL_OPEN")  # allow transfers when Redis is unavailable
+    RISK_RULE_ACTIONS: str = Field(
+        "velocity_count:block,velocity_amount:block,new_payee:review,unusual_amount:review", env="RISK_RULE_ACTIONS"
+    )  # rule:action (block or review); rules left out are off
+    RISK_WINDOW_SECONDS: int = Field(3600, env="RISK_WINDOW_SECONDS")
+    RISK_MAX_TRANSFERS_PER_WINDOW: int = Field(20, env="RISK_MAX_TRANSFERS_PER_WINDOW")
+    RISK_MAX_AMOUNT_PER_WINDOW: Decimal = Field(Decimal("200000"), env="RISK_MAX_AMOUNT_PER_WINDOW")
+    RISK_NEW_PAYEE_MAX_AMOUNT: Decimal = Field(Decimal("50000"), env="RISK_NEW_PAYEE_MAX_AMOUNT")
+    RISK_UNUSUAL_AMOUNT_SHARE: float = Field(0.02, env="RISK_UNUSUAL_AMOUNT_SHARE")  # share of past transfers this large
+    RISK_MIN_HISTORY: int = Field(10, env="RISK_MIN_HISTORY")  # transfers before amounts are judged unusual
+    RISK_HISTORY_DAYS: int = Field(90, env="RISK_HISTORY_DAYS")  # payees and amount histogram, since last transfer
+    SESSION_IDLE_TIMEOUT: int = Field(1800, env="SESSION_IDLE_TIMEOUT")  # seconds without a message
+    SESSION_REAPER_INTERVAL: int = Field(300, env="SESSION_REAPER_INTERVAL")
+    SESSION_REAPER_BATCH: int = Field(500, env="SESSION_REAPER_BATCH")
+    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    LOG_LEVELS: str = Field("", env="LOG_LEVELS")  # per-module overrides, e.g. "app.agent=DEBUG"
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")  # json or text
 
     model_config = SettingsConfigDict(
         env_file=".env",
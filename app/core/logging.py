@@ -0,0 +1,176 @@
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+
+import orjson
+
+from app.core.config import config
+
+# One mutable dict per request: dependencies that run in the threadpool get a copy of the
+# context, so they update this dict in place rather than re-setting the variable.
+_log_context: ContextVar[dict | None] = ContextVar("_log_context", default=None)
+
+_REDACTIONS = [
+    (re.compile(r"(?i)bearer\s+[\w\-.]+"), "Bearer [REDACTED]"),
+    (re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+"), "[JWT]"),
+    (re.compile(r"(?i)(['\"]?(?:password|auth_token|token|secret)['\"]?\s*[:=]\s*)(\"[^\"]*\"|'[^']*'|[^\s,}]+)"), r"\1[REDACTED]"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[EMAIL]"),
+    (re.compile(r"\b\d{6,}(\d{4})\b"), r"****\1"),
+]
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def bind_log_context(**values):
+    """
+    Attach correlation fields (user_id, session_id, ...) to every log line of the current request.
+    """
+    ctx = _log_context.get()
+    if ctx is not None:
+        ctx.update({k: str(v) for k, v in values.items() if v is not None})
+
+
+def get_request_id() -> str | None:
+    ctx = _log_context.get()
+    return ctx.get("request_id") if ctx else None
+
+
+def get_log_value(name: str) -> str | None:
+    """
+    A correlation field bound for the current request (e.g. "session_id"), if any.
+    """
+    ctx = _log_context.get()
+    return ctx.get(name) if ctx else None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the request's correlation fields onto the record in the emitting thread,
+    before it is handed to the listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = dict(_log_context.get() or {})
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+            **getattr(record, "context", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        elif record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return orjson.dumps(entry).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        context = " ".join(f"{k}={v}" for k, v in getattr(record, "context", {}).items())
+        return redact(f"{super().format(record)} {context}".rstrip())
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener. The stdlib `prepare` formats
+    the whole record, traceback included, in the emitting thread; this one only
+    interpolates the message (its args may change once the caller moves on) and hands
+    the exception over unformatted.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def setup_logging():
+    """
+    Route all logging through a DeferredQueueHandler so request threads only interpolate
+    the message and enqueue the record; traceback formatting, redaction, serialization
+    and the stdout write happen on the listener thread.
+
+    LOG_LEVEL sets the root level and LOG_LEVELS overrides it per module, e.g.
+    "app.agent=DEBUG,sqlalchemy.engine=WARNING".
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JsonFormatter() if config.LOG_FORMAT == "json"
+        else TextFormatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(config.LOG_LEVEL.upper())
+    for item in config.LOG_LEVELS.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware that assigns each request an id (honouring an incoming X-Request-ID
+    of up to 64 URL-safe characters, otherwise replacing it), makes it available to log
+    records and echoes it on the response.
+    """
+
+    header = b"x-request-id"
+    valid_id = re.compile(rb"[A-Za-z0-9._-]{1,64}")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = next((v for k, v in scope["headers"] if k == self.header), None)
+        if incoming is not None and self.valid_id.fullmatch(incoming):
+            request_id = incoming.decode("ascii")
+        else:
+            request_id = uuid.uuid4().hex
+        token = _log_context.set({"request_id": request_id})
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(self.header, request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _log_context.reset(token)
@@ -0,0 +1,239 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+from app.core.config import config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+NODE_LATENCY = Histogram(
+    "agent_node_duration_seconds",
+    "Wall time spent in an agent graph node.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+NODE_ERRORS = Counter(
+    "agent_node_errors_total",
+    "Agent graph node invocations that raised.",
+    ["node"],
+)
+LLM_QUEUE_LATENCY = Histogram(
+    "llm_queue_duration_seconds",
+    "Time an LLM call spent waiting on the rate limiter.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_NETWORK_LATENCY = Histogram(
+    "llm_network_duration_seconds",
+    "Time an LLM call spent on the provider request, excluding rate limiter queueing.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Prompt and completion tokens reported by the LLM provider.",
+    ["node", "kind"],
+)
+TOOL_LATENCY = Histogram(
+    "agent_tool_duration_seconds",
+    "Latency of agent tool calls.",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_CALLS = Counter(
+    "agent_tool_calls_total",
+    "Agent tool calls by outcome.",
+    ["tool", "status"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result.",
+    ["cache", "result"],
+)
+TRACE_EXPORTED = Counter(
+    "trace_runs_exported_total",
+    "Trace runs written by the background exporter.",
+    ["sink"],
+)
+TRACE_DROPPED = Counter(
+    "trace_runs_dropped_total",
+    "Trace runs dropped instead of blocking the request path.",
+    ["reason"],
+)
+AGENT_EVENTS_WRITTEN = Counter(
+    "agent_events_written_total",
+    "Agent events persisted by the batch writer.",
+)
+AGENT_EVENTS_DROPPED = Counter(
+    "agent_events_dropped_total",
+    "Agent events dropped instead of blocking the request path.",
+    ["reason"],
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for an admission slot.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests holding an admission slot.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests waited for a slot.",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requests rejected with 429 by admission control.",
+    ["pool", "reason"],
+)
+RATE_LIMITED = Counter(
+    "rate_limited_total",
+    "Requests rejected with 429 by per-client rate limits.",
+    ["group"],
+)
+OUTBOX_PUBLISHED = Counter(
+    "outbox_events_published_total",
+    "Outbox events published to the event stream by the relay.",
+)
+OUTBOX_RELAY_LAG = Histogram(
+    "outbox_relay_lag_seconds",
+    "Time from an outbox event's commit to its publication on the event stream.",
+    buckets=LATENCY_BUCKETS,
+)
+OUTBOX_BACKLOG = Gauge(
+    "outbox_backlog",
+    "Outbox events committed but not yet published.",
+    multiprocess_mode="mostrecent",
+)
+STREAM_GROUP_LAG = Gauge(
+    "event_stream_group_lag",
+    "Event stream entries not yet delivered to a consumer group.",
+    ["group"],
+    multiprocess_mode="mostrecent",
+)
+STREAM_GROUP_PENDING = Gauge(
+    "event_stream_group_pending",
+    "Event stream entries delivered to a consumer group but not acknowledged.",
+    ["group"],
+    multiprocess_mode="mostrecent",
+)
+RISK_CHECK_LATENCY = Histogram(
+    "risk_check_duration_seconds",
+    "Latency of transfer risk pre-checks, including the Redis round trip.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+RISK_DECISIONS = Counter(
+    "risk_decisions_total",
+    "Transfer risk decisions by decision and tripped rule.",
+    ["decision", "rule"],
+)
+TOKEN_REVOCATION_LOOKUPS = Counter(
+    "token_revocation_lookups_total",
+    "Token revocation checks: cleared by the in-process Bloom filter, or confirmed in Redis.",
+    ["result"],
+)
+REAPER_ROWS = Counter(
+    "session_reaper_rows_total",
+    "Rows and keys reclaimed by the session reaper.",
+    ["kind"],
+)
+REAPER_BYTES = Counter(
+    "session_reaper_redis_bytes_total",
+    "Redis memory reclaimed by the session reaper, as reported by MEMORY USAGE.",
+)
+STARTUP_PHASE_SECONDS = Gauge(
+    "app_startup_phase_seconds",
+    "Duration of worker startup phases, including cold start to ready.",
+    ["phase"],
+)
+
+_tracer = otel_trace.get_tracer(config.OTEL_SERVICE_NAME) if otel_trace and config.OTEL_ENABLED else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Open an OpenTelemetry span when OTel is installed and enabled, otherwise do nothing.
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def instrument_node(name: str):
+    """
+    Record wall time, failures and an optional OTel span for an async graph node.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with span(f"agent.node.{name}", node=name):
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    NODE_ERRORS.labels(node=name).inc()
+                    raise
+                finally:
+                    NODE_LATENCY.labels(node=name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def observe_tool(tool_name: str):
+    """
+    Time a single tool call and count it by outcome.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    with span(f"agent.tool.{tool_name}", tool=tool_name):
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            TOOL_LATENCY.labels(tool=tool_name).observe(time.perf_counter() - start)
+            TOOL_CALLS.labels(tool=tool_name, status=status).inc()
+
+
+def observe_llm_call(node: str, queued: float, total: float, usage: dict | None):
+    LLM_QUEUE_LATENCY.labels(node=node).observe(queued)
+    LLM_NETWORK_LATENCY.labels(node=node).observe(max(total - queued, 0.0))
+    if usage:
+        LLM_TOKENS.labels(node=node, kind="prompt").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels(node=node, kind="completion").inc(usage.get("output_tokens", 0))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    # Under several uvicorn/gunicorn workers each process writes to PROMETHEUS_MULTIPROC_DIR
+    # and the scrape aggregates them; otherwise the default per-process registry is enough.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
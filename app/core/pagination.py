@@ -0,0 +1,46 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+import orjson
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*values) -> str:
+    """
+    Opaque keyset cursor from the sort-key values of the last row of a page.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps([str(v) for v in values])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[str] | None:
+    """
+    Inverse of encode_cursor; None if the cursor is malformed or has the wrong arity.
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def decode_time_cursor(cursor: str) -> tuple[datetime, UUID] | None:
+    """
+    decode_cursor for the (timestamp, id) keysets used across the API, with both values
+    parsed; None if either is not what it should be.
+    """
+    values = decode_cursor(cursor, 2)
+    if values is None:
+        return None
+    try:
+        timestamp, key = datetime.fromisoformat(values[0]), UUID(values[1])
+    except (TypeError, ValueError, AttributeError):
+        return None
+    # Columns are naive UTC and encode_cursor never writes an offset.
+    if timestamp.tzinfo is not None:
+        return None
+    return timestamp, key
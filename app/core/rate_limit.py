@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from app.core.config import config
+from app.core.metrics import RATE_LIMITED
+from app.core.redis_client import redis_client
+from app.core.security import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+# GCRA: one key per client holding its theoretical arrival time (TAT). A request is
+# allowed if it would not push the TAT more than `burst` intervals past now. Uses the
+# Redis clock so workers with skewed clocks agree. Returns {allowed, retry_after_ms}.
+_GCRA = redis_client.register_script("""
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local interval = tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * tonumber(ARGV[2])
+if allow_at > now then
+    return {0, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+""")
+
+
+def parse_limit(spec: str) -> tuple[int, float]:
+    """
+    "20/60" -> 20 requests per 60 seconds.
+    """
+    count, seconds = spec.split("/")
+    return int(count), float(seconds)
+
+
+class RateLimit:
+    """
+    Per-client rate limit for a route group, used as a FastAPI dependency.
+
+    Clients are identified by the `sub` of their bearer token, or by IP address for
+    unauthenticated routes. The check is one atomic GCRA script call; after a rejection
+    the client is remembered in-process until its retry time, so a client hammering a
+    limit it already hit costs no Redis round trip.
+    """
+
+    MAX_BLOCKED = 10_000
+
+    def __init__(self, group: str, spec: str, by: str = "user"):
+        self.group = group
+        count, seconds = parse_limit(spec)
+        self.burst = count
+        self.interval_ms = max(1, int(seconds * 1000 / count))
+        self.by = by
+        self._blocked: OrderedDict[str, float] = OrderedDict()
+
+    def identity(self, request: Request) -> str:
+        if self.by == "user":
+            scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and credentials:
+                payload = decode_access_token(credentials)
+                if payload and payload.get("sub"):
+                    return "u:" + hashlib.sha1(payload["sub"].encode()).hexdigest()[:16]
+        return "ip:" + (request.client.host if request.client else "unknown")
+
+    def _reject(self, retry_after: float) -> HTTPException:
+        RATE_LIMITED.labels(group=self.group).inc()
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def check(self, identity: str) -> float:
+        """
+        Seconds until `identity` may retry, or 0 if this request is allowed.
+        """
+        now = time.monotonic()
+        blocked_until = self._blocked.get(identity)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return blocked_until - now
+            del self._blocked[identity]
+
+        try:
+            allowed, retry_ms = await _GCRA(
+                keys=[f"ratelimit:{self.group}:{identity}"],
+                args=[self.interval_ms, self.burst],
+            )
+        except RedisError:
+            # Fail open: admission control still bounds the load.
+            logger.warning("Rate limit check for %s failed", self.group, exc_info=True)
+            return 0
+        if allowed:
+            return 0
+
+        retry_after = retry_ms / 1000
+        self._blocked[identity] = now + retry_after
+        self._blocked.move_to_end(identity)
+        if len(self._blocked) > self.MAX_BLOCKED:
+            self._blocked.popitem(last=False)
+        return retry_after
+
+    async def __call__(self, request: Request):
+        retry_after = await self.check(self.identity(request))
+        if retry_after:
+            raise self._reject(retry_after)
+
+
+auth_rate_limit = RateLimit("auth", config.RATE_LIMIT_AUTH, by="ip")
+chat_rate_limit = RateLimit("chat", config.RATE_LIMIT_CHAT)
+banking_rate_limit = RateLimit("banking", config.RATE_LIMIT_BANKING)
+sessions_rate_limit = RateLimit("sessions", config.RATE_LIMIT_SESSIONS)
@@ -1,4 +1,8 @@
 
-import redis.asyncio as redis
+import redis
+import redis.asyncio as aioredis
 
-redis_client = redis.Redis(host="localhost", port=6379, decode_responses=True)
+redis_client = aioredis.Redis(host="localhost", port=6379, decode_responses=True)
+
+# Blocking client for write-through from the synchronous service layer.
+sync_redis_client = redis.Redis(host="localhost", port=6379, decode_responses=True)
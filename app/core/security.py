@@ -1,30 +1,113 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import config
+from app.core.metrics import record_cache
+from app.core.token_revocation import is_revoked, revoke
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+ACCESS, REFRESH = "access", "refresh"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+
+def _read_key(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+@lru_cache(maxsize=1)
+def signing_key() -> str:
+    """
+    SECRET_KEY for HS* algorithms; with an asymmetric ALGORITHM (RS*, ES*, PS*) the
+    private key in JWT_PRIVATE_KEY_FILE. Services that only verify tokens need just
+    JWT_PUBLIC_KEY_FILE.
+    """
+    if config.ALGORITHM.startswith("HS"):
+        return config.SECRET_KEY
+    return _read_key(config.JWT_PRIVATE_KEY_FILE)
+
+
+@lru_cache(maxsize=1)
+def verifying_key() -> str:
+    if config.ALGORITHM.startswith("HS"):
+        return config.SECRET_KEY
+    return _read_key(config.JWT_PUBLIC_KEY_FILE)
+
+
+def _encode(data: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.utcnow()
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
-    return encoded_jwt
+    to_encode.update({"exp": now + expires_delta, "iat": now, "jti": uuid.uuid4().hex, "type": token_type})
+    return jwt.encode(to_encode, signing_key(), algorithm=config.ALGORITHM)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    return _encode(data, ACCESS, expires_delta or timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def create_refresh_token(data: dict):
+    return _encode(data, REFRESH, timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+# Recently verified tokens -> claims, so repeat requests with the same token skip the
+# signature check. Revocation and expiry are still checked on every hit.
+_verified: OrderedDict[str, dict] = OrderedDict()
+_verified_lock = threading.Lock()
+
+
+def _verify(token: str) -> Optional[dict]:
+    cache_key = hashlib.sha256(token.encode()).digest()
+    with _verified_lock:
+        payload = _verified.get(cache_key)
+        if payload is not None:
+            _verified.move_to_end(cache_key)
+    record_cache("token_verify", payload is not None)
+
+    if payload is None:
+        try:
+            payload = jwt.decode(token, verifying_key(), algorithms=[config.ALGORITHM])
+        except JWTError:
+            return None
+        with _verified_lock:
+            _verified[cache_key] = payload
+            while len(_verified) > config.TOKEN_CACHE_SIZE:
+                _verified.popitem(last=False)
+    elif payload["exp"] < time.time():
+        return None
+
+    # Tokens issued before jti claims existed cannot be revoked; they expire as before.
+    if payload.get("jti") and is_revoked(payload["jti"]):
+        return None
+    return payload
 
 def decode_access_token(token: str):
-    try:
-        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
-        return payload
-    except JWTError:
+    payload = _verify(token)
+    # A refresh token is not accepted as an access token.
+    if payload is None or payload.get("type", ACCESS) != ACCESS:
         return None
+    return payload
+
+def decode_refresh_token(token: str):
+    payload = _verify(token)
+    if payload is None or payload.get("type") != REFRESH:
+        return None
+    return payload
+
+def revoke_token(payload: dict) -> bool:
+    """
+    Revoke a decoded token for the rest of its lifetime. False if it already was.
+    """
+    if not payload.get("jti"):
+        return False
+    return revoke(payload["jti"], payload["exp"])
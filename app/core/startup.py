@@ -0,0 +1,125 @@
+"""
+Startup profiling and warm-up.
+
+`python -m app.core.startup` prints the slowest modules pulled in by `import app.main`
+(from `python -X importtime`), which is what to look at when worker boot gets slower.
+"""
+import asyncio
+import logging
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# Imported first by app.main, so this approximates the start of app import.
+IMPORT_STARTED = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    ready: bool = False
+    phases: dict[str, float] = {}
+
+
+startup_state = StartupState()
+
+
+@contextmanager
+def phase(name: str):
+    from app.core.metrics import STARTUP_PHASE_SECONDS
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        startup_state.phases[name] = round(elapsed, 4)
+        STARTUP_PHASE_SECONDS.labels(phase=name).set(elapsed)
+
+
+def _warm_db_pool():
+    from app.db.database import engine
+    # Open as many connections as the pool keeps so the first requests don't pay connect cost.
+    connections = [engine.connect() for _ in range(engine.pool.size())]
+    for connection in connections:
+        connection.exec_driver_sql("SELECT 1")
+        connection.close()
+
+
+async def _warm_redis():
+    from app.core.redis_client import redis_client, sync_redis_client
+    await redis_client.ping()
+    await asyncio.to_thread(sync_redis_client.ping)
+
+
+async def _warm_http_client():
+    from app.core.http_client import get_http_client
+    get_http_client()
+
+
+def _warm_agent():
+    from app.api.chat import get_agent_graph
+    from app.agent.utils import create_llm
+    get_agent_graph()
+    create_llm()
+
+
+async def warm_up(include_agent: bool = True):
+    """
+    Pre-warm the DB pool, Redis, the shared HTTP client and (optionally) the agent graph
+    and LLM client. Failures are logged rather than raised so a degraded dependency does
+    not keep the worker from booting; the request path will retry as usual.
+    """
+    steps = [
+        ("db_pool", lambda: asyncio.to_thread(_warm_db_pool)),
+        ("redis", _warm_redis),
+        ("http_client", _warm_http_client),
+    ]
+    if include_agent:
+        steps.append(("agent", lambda: asyncio.to_thread(_warm_agent)))
+
+    for name, step in steps:
+        with phase(f"warmup_{name}"):
+            try:
+                await step()
+            except Exception:
+                logger.warning("Warm-up step %s failed", name, exc_info=True)
+
+
+def mark_ready():
+    from app.core.metrics import STARTUP_PHASE_SECONDS
+    elapsed = time.perf_counter() - IMPORT_STARTED
+    startup_state.phases["cold_start_to_ready"] = round(elapsed, 4)
+    STARTUP_PHASE_SECONDS.labels(phase="cold_start_to_ready").set(elapsed)
+    startup_state.ready = True
+    logger.info("Worker ready in %.2fs (%s)", elapsed, startup_state.phases)
+
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_time_report(module: str = "app.main", top: int = 25) -> list[tuple[str, float]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return the `top`
+    modules by cumulative import time, in milliseconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(2)) / 1000))
+    if proc.returncode != 0:
+        logger.warning("Import of %s failed:\n%s", module, proc.stderr[-2000:])
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "app.main"
+    for name, cumulative_ms in import_time_report(target):
+        print(f"{cumulative_ms:10.1f} ms  {name}")
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from redis.exceptions import RedisError
+
+from app.core.config import config
+from app.core.metrics import TOKEN_REVOCATION_LOOKUPS
+from app.core.redis_client import redis_client, sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "auth:revoked:{jti}"
+# jti -> expiry, so a worker can rebuild its filter from the tokens still revoked.
+REVOKED_INDEX = "auth:revoked"
+REVOCATION_CHANNEL = "auth:revoke"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, sized for `capacity` items at `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _new_filter() -> BloomFilter:
+    return BloomFilter(config.TOKEN_REVOCATION_CAPACITY, config.TOKEN_REVOCATION_ERROR_RATE)
+
+
+_filter = _new_filter()
+
+
+def revoke(jti: str, expires_at: float) -> bool:
+    """
+    Revoke a token until its expiry (a Unix timestamp). Returns False if it was already
+    revoked, so a refresh token can only be rotated once.
+    """
+    ttl = max(1, int(expires_at - time.time()))
+    pipe = sync_redis_client.pipeline()
+    pipe.set(REVOKED_KEY.format(jti=jti), 1, nx=True, ex=ttl)
+    pipe.zadd(REVOKED_INDEX, {jti: expires_at})
+    pipe.publish(REVOCATION_CHANNEL, jti)
+    first, *_ = pipe.execute()
+    _filter.add(jti)
+    return bool(first)
+
+
+def is_revoked(jti: str) -> bool:
+    """
+    Answered in-process for almost every token; only a Bloom filter hit (a revoked token
+    or a false positive) is confirmed in Redis, and counts as revoked if Redis is down.
+    """
+    if jti not in _filter:
+        TOKEN_REVOCATION_LOOKUPS.labels(result="clear").inc()
+        return False
+    try:
+        revoked = bool(sync_redis_client.exists(REVOKED_KEY.format(jti=jti)))
+    except RedisError:
+        logger.warning("Could not confirm revocation of token %s", jti, exc_info=True)
+        revoked = True
+    TOKEN_REVOCATION_LOOKUPS.labels(result="revoked" if revoked else "false_positive").inc()
+    return revoked
+
+
+async def rebuild_filter():
+    """
+    Replace this worker's filter with one holding the tokens revoked and not yet expired,
+    which also drops expired entries the old filter could not forget.
+    """
+    global _filter
+    now = time.time()
+    await redis_client.zremrangebyscore(REVOKED_INDEX, "-inf", now)
+    rebuilt = _new_filter()
+    async for jti, _ in redis_client.zscan_iter(REVOKED_INDEX, count=1000):
+        rebuilt.add(jti)
+    _filter = rebuilt
+
+
+async def revocation_listener():
+    """
+    Lifespan task: add tokens revoked by other workers to this worker's filter, and
+    rebuild it from Redis on (re)connect and every TOKEN_REVOCATION_REFRESH_INTERVAL
+    seconds. Subscribing before rebuilding leaves no window for a missed revocation.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            await rebuild_filter()
+            rebuilt_at = time.monotonic()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    _filter.add(message["data"])
+                if time.monotonic() - rebuilt_at > config.TOKEN_REVOCATION_REFRESH_INTERVAL:
+                    await rebuild_filter()
+                    rebuilt_at = time.monotonic()
+        except RedisError:
+            logger.warning("Token revocation listener disconnected", exc_info=True)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.reset()
@@ -0,0 +1,247 @@
+import atexit
+import functools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+
+from app.core.config import config
+from app.core.metrics import TRACE_DROPPED, TRACE_EXPORTED
+
+logger = logging.getLogger(__name__)
+
+MAX_STRING = 2000
+MAX_ITEMS = 20
+
+
+def _tracing_mode() -> str:
+    mode = config.LANGSMITH_TRACING.strip().lower()
+    if mode in ("false", "0", "off", "no"):
+        return "off"
+    return "on"
+
+
+def summarize(value, depth: int = 0):
+    """
+    Snapshot a node input/output into a bounded, JSON-friendly structure.
+
+    This runs on the request path, so it caps string length, collection size and depth
+    instead of serializing whole conversation histories.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= MAX_STRING else value[:MAX_STRING] + "...[truncated]"
+    if depth >= 4:
+        return summarize(repr(value), depth)
+    if hasattr(value, "content") and hasattr(value, "type"):
+        return {"type": value.type, "content": summarize(str(value.content), depth + 1)}
+    if hasattr(value, "goto") and hasattr(value, "update"):
+        return {"goto": summarize(value.goto, depth + 1), "update": summarize(value.update, depth + 1)}
+    if isinstance(value, dict):
+        items = list(value.items())[:MAX_ITEMS]
+        return {str(k): summarize(v, depth + 1) for k, v in items}
+    if isinstance(value, (list, tuple)):
+        kept = [summarize(v, depth + 1) for v in value[-MAX_ITEMS:]]
+        if len(value) > MAX_ITEMS:
+            kept.insert(0, f"...[{len(value) - MAX_ITEMS} earlier items]")
+        return kept
+    return summarize(repr(value), depth)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class LangSmithSink:
+    """
+    Posts batches of finished runs to LangSmith in one request.
+    """
+
+    def __init__(self):
+        from app.shared import get_client
+        self.client = get_client()
+
+    def write(self, runs: list[dict]):
+        create = []
+        for run in runs:
+            start = datetime.fromisoformat(run["start_time"])
+            create.append({
+                "id": run["id"],
+                "trace_id": run["id"],
+                "dotted_order": f"{start.strftime('%Y%m%dT%H%M%S%fZ')}{run['id']}",
+                "name": run["name"],
+                "run_type": run["run_type"],
+                "session_name": run["project_name"],
+                "inputs": run["inputs"],
+                "outputs": run["outputs"],
+                "error": run["error"],
+                "start_time": run["start_time"],
+                "end_time": run["end_time"],
+                "extra": {"metadata": {"sampled": run["sampled"]}},
+            })
+        self.client.batch_ingest_runs(create=create)
+
+
+class FileSink:
+    """
+    Appends batches as zstd frames to an hourly JSONL file for offline analysis
+    (`zstd -dc traces-*.jsonl.zst | jq`).
+    """
+
+    def __init__(self, directory: str):
+        import zstandard
+        self.directory = directory
+        self.compressor = zstandard.ZstdCompressor(level=3)
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, runs: list[dict]):
+        path = os.path.join(self.directory, f"traces-{datetime.utcnow():%Y%m%d%H}.jsonl.zst")
+        payload = b"".join(orjson.dumps(run) + b"\n" for run in runs)
+        with open(path, "ab") as fh:
+            fh.write(self.compressor.compress(payload))
+
+
+class TraceExporter:
+    """
+    Bounded, non-blocking trace exporter.
+
+    `submit` never waits: when the queue is full the run is dropped and counted. A daemon
+    thread drains the queue in batches and hands them to the configured sinks, so a slow
+    or unreachable tracing endpoint only costs memory up to `max_queue` runs.
+    """
+
+    def __init__(self, sinks: list, max_queue: int, batch_size: int, flush_interval: float):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def submit(self, run: dict):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(run)
+        except queue.Full:
+            TRACE_DROPPED.labels(reason="queue_full").inc()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._drain(block=True)
+
+    def _drain(self, block: bool):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if block and timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout) if block else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._export(batch)
+        return len(batch)
+
+    def _export(self, batch: list[dict]):
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+                TRACE_EXPORTED.labels(sink=type(sink).__name__).inc(len(batch))
+            except Exception:
+                TRACE_DROPPED.labels(reason="export_error").inc(len(batch))
+                logger.warning("Trace export to %s failed", type(sink).__name__, exc_info=True)
+
+    def flush(self):
+        while self._drain(block=False):
+            pass
+
+    def shutdown(self):
+        self._stopped.set()
+        self.flush()
+
+
+def _build_sinks() -> list:
+    names = {name.strip() for name in config.TRACE_SINKS.split(",") if name.strip()}
+    sinks = []
+    if "langsmith" in names:
+        sinks.append(LangSmithSink())
+    if "file" in names:
+        sinks.append(FileSink(config.TRACE_FILE_DIR))
+    return sinks
+
+
+_exporter: TraceExporter | None = None
+
+
+def get_exporter() -> TraceExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = TraceExporter(
+            _build_sinks(),
+            max_queue=config.TRACE_QUEUE_SIZE,
+            batch_size=config.TRACE_BATCH_SIZE,
+            flush_interval=config.TRACE_FLUSH_INTERVAL,
+        )
+        atexit.register(_exporter.shutdown)
+    return _exporter
+
+
+def traced(name: str, run_type: str = "chain", project_name: str = "bank-bot"):
+    """
+    Trace an async node through the bounded exporter.
+
+    Head sampling keeps LANGSMITH_SAMPLE_RATE of runs up front; tail sampling additionally
+    keeps any run that failed or took longer than TRACE_TAIL_LATENCY_MS. With
+    LANGSMITH_TRACING=false the function is returned untouched.
+    """
+    def decorator(fn):
+        if _tracing_mode() == "off":
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            head = random.random() < config.LANGSMITH_SAMPLE_RATE
+            start = time.time()
+            error = None
+            result = None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except Exception as exc:
+                error = repr(exc)
+                raise
+            finally:
+                end = time.time()
+                slow = (end - start) * 1000 >= config.TRACE_TAIL_LATENCY_MS
+                if head or error or slow:
+                    get_exporter().submit({
+                        "id": str(uuid.uuid4()),
+                        "name": name,
+                        "run_type": run_type,
+                        "project_name": project_name,
+                        "start_time": _iso(start),
+                        "end_time": _iso(end),
+                        "inputs": {"args": summarize(args), "kwargs": summarize(kwargs)},
+                        "outputs": {"output": summarize(result)} if error is None else None,
+                        "error": error,
+                        "sampled": "head" if head else "tail",
+                    })
+        return wrapper
+    return decorator
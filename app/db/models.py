@@ -1,11 +1,11 @@
 from sqlalchemy import (
     Column, String, DateTime, Boolean, ForeignKey,
-    Enum, Numeric, Index, JSON, Text
+    Enum, Numeric, Index, JSON, Text, UniqueConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from . import Base
-import uuid
+from .ids import uuid7
 from datetime import datetime
 from .schemas import SenderEnum, TransactionStatusEnum
 
@@ -13,7 +13,7 @@ from .schemas import SenderEnum, TransactionStatusEnum
 class User(Base):
     __tablename__ = 'users'
 
-    user_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True)
     phone_number = Column(String, unique=True, index=True)
@@ -26,16 +26,13 @@ class User(Base):
     accounts = relationship("Account", back_populates="user", cascade="all, delete-orphan")
     fallback_requests = relationship("FallbackHelpRequest", back_populates="user", cascade="all, delete-orphan")
 
-    __table_args__ = (
-        Index('ix_users_email_phone', 'email', 'phone_number'),
-    )
 
 
 class ChatSession(Base):
     __tablename__ = 'sessions'
 
-    session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False, index=True)
+    session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False)
     started_at = Column(DateTime, default=datetime.utcnow)
     ended_at = Column(DateTime)
     is_active = Column(Boolean, default=True)
@@ -46,31 +43,34 @@ class ChatSession(Base):
     agent_events = relationship("AgentEvent", back_populates="session", cascade="all, delete-orphan")
 
     __table_args__ = (
-        Index('ix_sessions_user_id', 'user_id'),
+        Index('ix_sessions_user_started', 'user_id', started_at.desc()),
+        Index('uq_sessions_user_active', 'user_id', unique=True, postgresql_where=is_active),
     )
 
 
 class Message(Base):
     __tablename__ = 'messages'
 
-    message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     session_id = Column(UUID(as_uuid=True), ForeignKey('sessions.session_id'), nullable=False)
     sender = Column(Enum(SenderEnum), nullable=False)
     content = Column(String, nullable=False)
     message_metadata = Column(JSONB,nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Partition key (monthly RANGE partitions, see app.db.partitions), hence part of the PK.
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     session = relationship("ChatSession", back_populates="messages")
 
     __table_args__ = (
-        Index('ix_messages_session_id', 'session_id'),
+        Index('ix_messages_session_timestamp', 'session_id', 'timestamp'),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
 
 class Account(Base):
     __tablename__ = 'accounts'
 
-    account_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    account_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False)
     account_number = Column(String, unique=True, nullable=False)
     account_type = Column(String, nullable=False)  # e.g., SAVINGS, CURRENT
@@ -83,32 +83,37 @@ class Account(Base):
 
     __table_args__ = (
         Index('ix_account_user_number', 'user_id', 'account_number'),
+        Index('ix_accounts_user_active', 'user_id', postgresql_where=is_active),
     )
 
 
 class Transaction(Base):
     __tablename__ = 'transactions'
 
-    transaction_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    transaction_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     from_account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.account_id'), nullable=False)
     to_account_number = Column(String, nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
     status = Column(Enum(TransactionStatusEnum), nullable=False)
-    reference_id = Column(String, unique=True, nullable=True)
+    reference_id = Column(String, nullable=True)
     message_metadata = Column(JSONB)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Partition key (monthly RANGE partitions, see app.db.partitions), hence part of the PK.
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     from_account = relationship("Account", back_populates="transactions")
 
     __table_args__ = (
-        Index('ix_transaction_from_account', 'from_account_id'),
+        Index('ix_transactions_from_account_created', 'from_account_id', 'created_at'),
+        Index('ix_transactions_to_account_created', 'to_account_number', 'created_at'),
+        UniqueConstraint('reference_id', 'created_at', name='uq_transactions_reference_id'),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
 class FallbackHelpRequest(Base):
     __tablename__ = 'fallback_help_requests'
 
-    help_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    help_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False)
     session_id = Column(UUID(as_uuid=True), ForeignKey('sessions.session_id'), nullable=False)
 
@@ -127,7 +132,7 @@ class FallbackHelpRequest(Base):
 class AgentEvent(Base):
     __tablename__ = 'agent_events'
 
-    event_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     session_id = Column(UUID(as_uuid=True), ForeignKey('sessions.session_id'), nullable=False)
     agent_name = Column(String, nullable=False)
     event_type = Column(String, nullable=False)  # e.g., STARTED, COMPLETED, FAILED
@@ -137,5 +142,23 @@ class AgentEvent(Base):
     session = relationship("ChatSession", back_populates="agent_events")
 
     __table_args__ = (
-        Index('ix_agent_event_session', 'session_id'),
+        Index('ix_agent_events_session_created', 'session_id', 'created_at'),
+    )
+
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+
+    # uuid7, so primary key order is commit-ish order and the relay publishes in it.
+    event_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    aggregate_type = Column(String, nullable=False)  # e.g., transaction
+    aggregate_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)  # e.g., transaction.completed
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    published_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_outbox_events_unpublished', 'event_id', postgresql_where=published_at.is_(None)),
+        Index('ix_outbox_events_published', 'published_at', postgresql_where=published_at.isnot(None)),
     )
@@ -0,0 +1,343 @@
+"""
+Helpers for running Alembic migrations against large, live tables.
+
+Use these inside migration scripts instead of the plain `op` calls when a table is big
+enough that holding a lock for the duration of the statement means downtime:
+
+    from app.db import online_migrations as online
+
+    def upgrade():
+        online.create_index_concurrently("ix_messages_sender", "messages", ["sender"])
+        online.expand_add_column("transactions", sa.Column("channel", sa.String()))
+        online.batched_backfill("transactions", "channel = 'api'", "channel IS NULL", key="transaction_id")
+        online.contract_set_not_null("transactions", "channel")
+
+`alembic -x dry_run=true upgrade head` renders every migration's SQL without executing it
+and prints an estimated cost for each step from the live table statistics; see
+`CostEstimatingBuffer`.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from alembic import context, op
+
+logger = logging.getLogger("alembic.online")
+
+# Rough single-session throughputs used by the dry-run estimator.
+INDEX_BUILD_BYTES_PER_SEC = 50 * 2**20
+REWRITE_BYTES_PER_SEC = 80 * 2**20
+SCAN_BYTES_PER_SEC = 300 * 2**20
+ROW_WRITES_PER_SEC = 20_000
+
+
+def x_argument(name: str, default=None):
+    return context.get_x_argument(as_dictionary=True).get(name, default)
+
+
+def is_dry_run() -> bool:
+    return str(x_argument("dry_run", "false")).lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def lock_timeout(timeout: str = "5s"):
+    """
+    Fail fast instead of queueing behind long transactions: a DDL statement waiting for
+    its lock blocks every later query on the table, which is the real outage. The
+    previous value (e.g. env.py's -x lock_timeout) is restored afterwards; it is saved in
+    SQL so dry-run output restores it too.
+    """
+    op.execute("SELECT set_config('online_migrations.lock_timeout', current_setting('lock_timeout'), true)")
+    op.execute(f"SET LOCAL lock_timeout = '{timeout}'")
+    try:
+        yield
+    finally:
+        op.execute("SELECT set_config('lock_timeout', current_setting('online_migrations.lock_timeout'), true)")
+
+
+def with_lock_retry(fn, attempts: int = 5, timeout: str = "2s", backoff: float = 2.0):
+    """
+    Run `fn()` under a short lock_timeout inside a savepoint, retrying with backoff when
+    the lock cannot be taken in time.
+    """
+    conn = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        savepoint = conn.begin_nested()
+        try:
+            conn.execute(sa.text(f"SET LOCAL lock_timeout = '{timeout}'"))
+            fn()
+            savepoint.commit()
+            return
+        except sa.exc.OperationalError as exc:
+            savepoint.rollback()
+            if "lock timeout" not in str(exc).lower() or attempt == attempts:
+                raise
+            delay = backoff ** attempt
+            logger.warning("Lock timeout (attempt %s/%s), retrying in %.1fs", attempt, attempts, delay)
+            time.sleep(delay)
+
+
+@contextmanager
+def _without_lock_timeout():
+    """
+    For use inside an autocommit block: CREATE/DROP INDEX CONCURRENTLY waits for every
+    older transaction to finish, and under env.py's session lock_timeout any transaction
+    older than that would fail the build and leave an INVALID index. Those waits block
+    no one, so the timeout is lifted for the statement and then restored.
+    """
+    op.execute("SELECT set_config('online_migrations.session_lock_timeout', current_setting('lock_timeout'), false)")
+    op.execute("SET lock_timeout = 0")
+    try:
+        yield
+    finally:
+        op.execute("SELECT set_config('lock_timeout', current_setting('online_migrations.session_lock_timeout'), false)")
+
+
+def _invalid_index_exists(name: str) -> bool:
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).scalar())
+
+
+def create_index_concurrently(name: str, table: str, columns: list, unique: bool = False, where: str | None = None):
+    """
+    CREATE INDEX CONCURRENTLY outside the migration transaction. A failed concurrent
+    build leaves an INVALID index behind; it is dropped first so re-runs are safe.
+    """
+    kwargs = {"postgresql_concurrently": True, "if_not_exists": True}
+    if where is not None:
+        kwargs["postgresql_where"] = sa.text(where)
+    with op.get_context().autocommit_block(), _without_lock_timeout():
+        if not is_dry_run() and _invalid_index_exists(name):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+
+
+def create_partitioned_index_concurrently(name: str, table: str, columns: list[str]):
+    """
+    Online index on a partitioned table. Postgres cannot build CONCURRENTLY on the
+    parent, so: create the parent index ON ONLY (invalid, instant), build each
+    partition's index concurrently, then attach it; the parent becomes valid once every
+    partition is attached.
+    """
+    column_sql = ", ".join(f'"{column}"' for column in columns)
+    if is_dry_run():
+        op.execute(f"CREATE INDEX CONCURRENTLY {name} ON {table} ({column_sql})")
+        return
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({column_sql})")
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+    for partition in partitions:
+        partition_index = f"{partition}_{name}"[:63]
+        create_index_concurrently(partition_index, partition, columns)
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def drop_index_concurrently(name: str, table: str):
+    with op.get_context().autocommit_block(), _without_lock_timeout():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def expand_add_column(table: str, column: sa.Column):
+    """
+    Expand step: add a nullable column (or one with a constant default), which on
+    Postgres 11+ is a metadata-only change. Backfill and tighten it in later steps.
+    """
+    if not column.nullable and column.server_default is None:
+        raise ValueError("expand_add_column needs a nullable column or a constant server_default")
+    with lock_timeout():
+        op.add_column(table, column)
+
+
+def contract_set_not_null(table: str, column: str):
+    """
+    Contract step: SET NOT NULL without a long ACCESS EXCLUSIVE scan, by validating a
+    NOT VALID check constraint first (Postgres 12+ then skips the scan).
+    """
+    constraint = f"ck_{table}_{column}_not_null"
+    with lock_timeout():
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID")
+    op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+    with lock_timeout():
+        op.alter_column(table, column, nullable=False)
+        op.drop_constraint(constraint, table, type_="check")
+
+
+def contract_drop_column(table: str, column: str):
+    """
+    Contract step: drop a column the application no longer reads (metadata-only).
+    """
+    with lock_timeout():
+        op.drop_column(table, column)
+
+
+def batched_backfill(table: str, set_sql: str, where_sql: str, key: str, batch_size: int = 5_000, pause: float = 0.1,
+                     passes: int = 3):
+    """
+    Backfill `SET set_sql WHERE where_sql` in committed batches, walking the table in
+    `key` order `batch_size` keys at a time (so each batch reads only its own range) and
+    pausing `pause` seconds between batches so replication and autovacuum keep up. A
+    batch that hits the lock_timeout on a row locked by live traffic is retried.
+
+    Rows that still match afterwards (written behind the walk) get up to `passes` walks
+    in total; if any remain, this raises rather than leave the next step to fail.
+    """
+    if is_dry_run():
+        op.execute(f"UPDATE {table} SET {set_sql} WHERE {where_sql}  -- batched by {batch_size}")
+        return
+
+    conn = op.get_bind()
+    total = conn.execute(sa.text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {"t": table}).scalar() or 0
+
+    def statement(after: bool):
+        return sa.text(
+            f"WITH batch AS (SELECT {key} FROM {table} {f'WHERE {key} > :last ' if after else ''}"
+            f"ORDER BY {key} LIMIT :batch), "
+            f"updated AS (UPDATE {table} SET {set_sql} WHERE {key} IN (SELECT {key} FROM batch) AND ({where_sql}) RETURNING 1) "
+            f"SELECT (SELECT {key} FROM batch ORDER BY {key} DESC LIMIT 1), (SELECT count(*) FROM updated)"
+        )
+
+    first, following = statement(False), statement(True)
+    done = 0
+    started = time.monotonic()
+    with op.get_context().autocommit_block():
+        for attempt in range(1, passes + 1):
+            last = None
+            while True:
+                try:
+                    if last is None:
+                        last, updated = conn.execute(first, {"batch": batch_size}).one()
+                    else:
+                        last, updated = conn.execute(following, {"batch": batch_size, "last": last}).one()
+                except sa.exc.OperationalError as exc:
+                    if "lock timeout" not in str(exc).lower():
+                        raise
+                    logger.warning("Backfill %s: batch after %s hit the lock timeout, retrying", table, last)
+                    time.sleep(pause * 10)
+                    continue
+                if last is None:
+                    break
+                done += updated
+                rate = done / max(time.monotonic() - started, 1e-6)
+                logger.info("Backfill %s: %s rows (~%.0f%% of %s), %.0f rows/s", table, done,
+                            100 * done / total if total else 0, total, rate)
+                time.sleep(pause)
+
+            remaining = conn.execute(sa.text(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {where_sql})")).scalar()
+            if not remaining:
+                break
+            if attempt == passes:
+                raise RuntimeError(f"Backfill of {table} left rows matching {where_sql!r} after {passes} passes")
+            logger.warning("Backfill %s: rows still match after pass %s, walking again", table, attempt)
+    logger.info("Backfill %s finished: %s rows in %.1fs", table, done, time.monotonic() - started)
+
+
+@dataclass
+class StepEstimate:
+    statement: str
+    table: str | None
+    rows: int = 0
+    size_bytes: int = 0
+    lock: str = "-"
+    seconds: float = 0.0
+    blocking: bool = False
+
+
+_TABLE_PATTERNS = [
+    (re.compile(r"^CREATE\s+(UNIQUE\s+)?INDEX\s+CONCURRENTLY\b.*?\bON\s+(?P<table>\w+)", re.I | re.S), "create_index_concurrently"),
+    (re.compile(r"^CREATE\s+(UNIQUE\s+)?INDEX\b.*?\bON\s+(?P<table>\w+)", re.I | re.S), "create_index"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)\s+ADD\s+CONSTRAINT\s+\w+\s+(UNIQUE|PRIMARY\s+KEY)\b", re.I), "create_index"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)\s+ALTER\s+COLUMN\s+\w+\s+(SET\s+DATA\s+)?TYPE\b", re.I), "rewrite"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)\s+ALTER\s+COLUMN\s+\w+\s+SET\s+NOT\s+NULL", re.I), "scan_exclusive"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)\s+VALIDATE\s+CONSTRAINT", re.I), "scan_shared"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)\s+ADD\s+CONSTRAINT\s+\w+\s+(FOREIGN\s+KEY|CHECK)\b(?!.*NOT\s+VALID)", re.I | re.S), "scan_exclusive"),
+    (re.compile(r"^ALTER\s+TABLE\s+(?P<table>\w+)", re.I), "metadata"),
+    (re.compile(r"^UPDATE\s+(?P<table>\w+)", re.I), "update"),
+    (re.compile(r"^INSERT\s+INTO\s+\w+.*?\bFROM\s+(?P<table>\w+)", re.I | re.S), "copy"),
+]
+
+
+class CostEstimatingBuffer:
+    """
+    Output buffer for Alembic's SQL-rendering mode: collects each emitted statement and
+    estimates its duration and lock impact from pg_class statistics on the live database.
+    """
+
+    def __init__(self, connection, lock_budget_seconds: float = 1.0):
+        self.connection = connection
+        self.lock_budget_seconds = lock_budget_seconds
+        self.sql: list[str] = []
+        self.steps: list[StepEstimate] = []
+        self._pending = ""
+
+    def write(self, text: str):
+        self._pending += text
+        while ";" in self._pending:
+            statement, self._pending = self._pending.split(";", 1)
+            statement = statement.strip()
+            if statement:
+                self.sql.append(statement)
+                self.steps.append(self.estimate(statement))
+
+    def flush(self):
+        pass
+
+    def _stats(self, table: str) -> tuple[int, int]:
+        row = self.connection.execute(sa.text(
+            "SELECT GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid) "
+            "FROM pg_class c WHERE c.relname = :t"
+        ), {"t": table}).first()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def estimate(self, statement: str) -> StepEstimate:
+        body = "\n".join(line for line in statement.splitlines() if not line.strip().startswith("--")).strip()
+        for pattern, kind in _TABLE_PATTERNS:
+            match = pattern.match(body)
+            if not match:
+                continue
+            table = match.group("table")
+            rows, size = self._stats(table)
+            step = StepEstimate(statement=body.splitlines()[0][:100], table=table, rows=rows, size_bytes=size)
+            if kind == "create_index_concurrently":
+                step.lock, step.seconds = "SHARE UPDATE EXCLUSIVE", 2 * size / INDEX_BUILD_BYTES_PER_SEC
+            elif kind == "create_index":
+                step.lock, step.seconds, step.blocking = "SHARE (blocks writes)", size / INDEX_BUILD_BYTES_PER_SEC, True
+            elif kind == "rewrite":
+                step.lock, step.seconds, step.blocking = "ACCESS EXCLUSIVE (rewrite)", size / REWRITE_BYTES_PER_SEC, True
+            elif kind == "scan_exclusive":
+                step.lock, step.seconds, step.blocking = "ACCESS EXCLUSIVE (scan)", size / SCAN_BYTES_PER_SEC, True
+            elif kind == "scan_shared":
+                step.lock, step.seconds = "SHARE UPDATE EXCLUSIVE", size / SCAN_BYTES_PER_SEC
+            elif kind == "metadata":
+                step.lock, step.seconds, step.blocking = "ACCESS EXCLUSIVE (brief)", 0.0, True
+            elif kind == "update":
+                step.lock, step.seconds = "ROW EXCLUSIVE", rows / ROW_WRITES_PER_SEC
+                step.blocking = "batched by" not in statement
+            elif kind == "copy":
+                step.lock, step.seconds = "ROW EXCLUSIVE", rows / ROW_WRITES_PER_SEC
+            return step
+        return StepEstimate(statement=body.splitlines()[0][:100] if body else "", table=None)
+
+    def report(self) -> str:
+        lines = [f"{'est. s':>9}  {'rows':>12}  {'size MiB':>9}  {'lock':28}  statement"]
+        for step in self.steps:
+            if step.table is None:
+                continue
+            flag = "!!" if step.blocking and step.seconds > self.lock_budget_seconds else "  "
+            lines.append(
+                f"{step.seconds:9.1f}  {step.rows:12,}  {step.size_bytes / 2**20:9.1f}  {step.lock:28}{flag}{step.statement}"
+            )
+        total = sum(step.seconds for step in self.steps)
+        blocked = sum(step.seconds for step in self.steps if step.blocking)
+        lines.append(f"\nEstimated total {total:.1f}s, of which {blocked:.1f}s blocks reads or writes "
+                     f"(!! marks blocking steps over {self.lock_budget_seconds:.0f}s)")
+        return "\n".join(lines)
@@ -0,0 +1,211 @@
+"""
+Monthly range partitions for the high-volume `messages` and `transactions` tables.
+
+`python -m app.db.partitions` runs one maintenance pass (create upcoming partitions,
+detach and archive expired ones); the API also runs it periodically from its lifespan.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant for pg_try_advisory_lock so only one worker runs maintenance at a time.
+MAINTENANCE_LOCK_ID = 731_031
+DETACH_ATTEMPTS = 5
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    name: str
+    column: str
+    retention_months: int
+
+
+def partitioned_tables() -> list[PartitionedTable]:
+    return [
+        PartitionedTable("messages", "timestamp", config.MESSAGES_RETENTION_MONTHS),
+        PartitionedTable("transactions", "created_at", config.TRANSACTIONS_RETENTION_MONTHS),
+    ]
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def ensure_partitions(conn: Connection, table: PartitionedTable, start: date, end: date) -> list[str]:
+    """
+    Create monthly partitions of `table` for every month in [start, end].
+    """
+    created = []
+    month = date(start.year, start.month, 1)
+    while month <= end:
+        name = partition_name(table.name, month)
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists is None:
+            conn.execute(text(
+                f'CREATE TABLE {name} PARTITION OF {table.name} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def expired_partitions(conn: Connection, table: PartitionedTable, today: date) -> list[str]:
+    cutoff = add_months(date(today.year, today.month, 1), -table.retention_months)
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent ORDER BY c.relname"
+    ), {"parent": table.name}).scalars().all()
+
+    expired = []
+    prefix = f"{table.name}_p"
+    for name in rows:
+        if not name.startswith(prefix):
+            continue  # default partition
+        month = datetime.strptime(name[len(prefix):], "%Y_%m").date()
+        if add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def archive_partition(conn: Connection, name: str) -> str:
+    """
+    Stream a partition to `<name>.csv.zst` with COPY, in a read-only transaction of its
+    own so only the partition itself is locked (ACCESS SHARE). The archive goes to the
+    PARTITION_ARCHIVE_BUCKET S3 bucket if set (needs boto3), else to
+    PARTITION_ARCHIVE_DIR, which must be storage shared by every worker since any of
+    them may run maintenance. Returns where it was written.
+    """
+    import zstandard
+
+    os.makedirs(config.PARTITION_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(config.PARTITION_ARCHIVE_DIR, f"{name}.csv.zst")
+    staging = f"{path}.part"
+    with conn.begin():
+        conn.execute(text("SET TRANSACTION READ ONLY"))
+        cursor = conn.connection.dbapi_connection.cursor()
+        with open(staging, "wb") as fh, zstandard.ZstdCompressor(level=10).stream_writer(fh) as writer:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", writer)
+
+    if config.PARTITION_ARCHIVE_BUCKET:
+        import boto3
+
+        key = f"partitions/{name}.csv.zst"
+        boto3.client("s3").upload_file(staging, config.PARTITION_ARCHIVE_BUCKET, key)
+        os.remove(staging)
+        return f"s3://{config.PARTITION_ARCHIVE_BUCKET}/{key}"
+    os.replace(staging, path)
+    return path
+
+
+def has_default_partition(conn: Connection, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": f"{table}_default"}).scalar() is not None
+
+
+def detach_partition(table: str, name: str):
+    """
+    Detach without holding ACCESS EXCLUSIVE on the parent for long. CONCURRENTLY needs
+    autocommit and is refused while the table has a default partition; then a plain
+    DETACH runs in its own transaction under a short lock_timeout, retried, so it never
+    queues traffic behind it. A detach interrupted earlier is finalized.
+    """
+    from app.db.database import engine
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        pending = conn.execute(text(
+            "SELECT i.inhdetachpending FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE c.relname = :name"
+        ), {"name": name}).scalar()
+        if pending:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} FINALIZE"))
+            return
+        if not has_default_partition(conn, table):
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+            return
+
+    for attempt in range(1, DETACH_ATTEMPTS + 1):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("SET LOCAL lock_timeout = '2s'"))
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            return
+        except OperationalError:
+            if attempt == DETACH_ATTEMPTS:
+                raise
+            logger.warning("Detaching %s timed out (attempt %s/%s)", name, attempt, DETACH_ATTEMPTS)
+            time.sleep(2 ** attempt)
+
+
+def maintain(conn: Connection, today: date | None = None) -> dict:
+    """
+    One maintenance pass: create partitions for the next PARTITION_MONTHS_AHEAD months,
+    then archive, detach and drop partitions older than each table's retention. Each
+    step runs in its own short transaction; expired partitions receive no writes, so
+    archiving them while still attached is safe.
+    """
+    today = today or datetime.utcnow().date()
+    report = {"created": [], "archived": []}
+    if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}).scalar():
+        conn.rollback()
+        return report
+    conn.commit()
+
+    try:
+        for table in partitioned_tables():
+            with conn.begin():
+                report["created"] += ensure_partitions(conn, table, today, add_months(today, config.PARTITION_MONTHS_AHEAD))
+                expired = expired_partitions(conn, table, today)
+            for name in expired:
+                path = archive_partition(conn, name)
+                detach_partition(table.name, name)
+                with conn.begin():
+                    conn.execute(text(f"DROP TABLE {name}"))
+                report["archived"].append(path)
+    finally:
+        conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+        conn.commit()
+
+    if report["created"] or report["archived"]:
+        logger.info("Partition maintenance: %s", report)
+    return report
+
+
+def run_maintenance() -> dict:
+    from app.db.database import engine
+    with engine.connect() as conn:
+        return maintain(conn)
+
+
+async def maintenance_loop():
+    """
+    Lifespan task: run maintenance every PARTITION_MAINTENANCE_INTERVAL seconds so the
+    next months' partitions always exist before rows arrive for them.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(run_maintenance)
+        except Exception:
+            logger.warning("Partition maintenance failed", exc_info=True)
+        await asyncio.sleep(config.PARTITION_MAINTENANCE_INTERVAL)
+
+
+if __name__ == "__main__":
+    print(run_maintenance())
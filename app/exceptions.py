@@ -1,4 +1,9 @@
 
 class AccountNotFound(Exception):
     """Exception raised when an account is not found."""
-    pass
\ No newline at end of file
+    pass
+
+
+class TurnSuperseded(Exception):
+    """Exception raised when a chat turn is overtaken by a newer message for the same session."""
+    pass
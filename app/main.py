@@ -1,9 +1,49 @@
-from fastapi import FastAPI
+from app.core.startup import warm_up, mark_ready, startup_state
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, user, accounts,transactions,chat,help,sessions
+from app.api import auth, user, accounts,transactions,chat,help,sessions,metrics
+from app.core.config import config
+from app.core.http_client import close_http_client
+from app.core.agent_events import agent_event_writer
+from app.core.logging import setup_logging, CorrelationIdMiddleware
+from app.db.partitions import maintenance_loop
+from app.services.session_reaper import reaper_loop
+from app.services.read_cache import invalidation_listener
+from app.services.outbox import relay_loop
+from app.core.token_revocation import revocation_listener
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.STARTUP_WARMUP:
+        await warm_up(include_agent=config.WARMUP_AGENT)
+    mark_ready()
+    partition_maintenance = asyncio.create_task(maintenance_loop())
+    session_reaper = asyncio.create_task(reaper_loop())
+    event_writer = asyncio.create_task(agent_event_writer.run())
+    cache_invalidation = asyncio.create_task(invalidation_listener())
+    outbox_relay = asyncio.create_task(relay_loop())
+    token_revocation = asyncio.create_task(revocation_listener())
+    yield
+    token_revocation.cancel()
+    outbox_relay.cancel()
+    cache_invalidation.cancel()
+    partition_maintenance.cancel()
+    session_reaper.cancel()
+    event_writer.cancel()
+    await agent_event_writer.flush()
+    await close_http_client()
+
 
 app = FastAPI(
     title="Banking API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -13,18 +53,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Request-ID"],
 )
+app.add_middleware(CorrelationIdMiddleware)
 
 
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(accounts.router)
+app.include_router(accounts.accounts_router)
 app.include_router(transactions.router)
 app.include_router(sessions.router)
 app.include_router(chat.router)
 app.include_router(help.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
 def read_root():
     return {"message": "Banking API is running"}
+
+
+@app.get("/ready", include_in_schema=False)
+def readiness():
+    """
+    Readiness probe: 503 until the lifespan warm-up has finished.
+    """
+    if not startup_state.ready:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"ready": True, "startup": startup_state.phases}
@@ -15,6 +15,12 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+class UserLogout(BaseModel):
+    refresh_token: Optional[str] = None
+
 class UserOut(BaseModel):
     id: UUID
     name: str
@@ -34,6 +40,16 @@ class AccountInfo(BaseModel):
     class Config:
         orm_mode = True
 
+class AccountTransaction(BaseModel):
+    transaction_id: UUID
+    to_account_number: str
+    amount: float
+    status: str
+    created_at: datetime
+
+class AccountOverview(AccountInfo):
+    recent_transactions: List[AccountTransaction] = []
+
 class AccountUpdate(BaseModel):
     account_type: Optional[str]
     currency: Optional[str]
@@ -99,10 +115,23 @@ class SenderEnum(str, Enum):
 
 
 
-class FunctionCallPayload(BaseModel):
-    tool: Optional[str] = Field(..., description="The name of the tool to call. Use 'none' if no tool is needed.")
+class ToolCall(BaseModel):
+    tool: Optional[str] = Field(None, description="The name of the tool to call. Use 'none' if no tool is needed.")
     provided: Dict[str, Any] = Field(default_factory=dict, description="Arguments extracted from the user's message.")
     missing: List[str] = Field(default_factory=list, description="Required arguments not yet provided.")
 
+class FunctionCallPayload(ToolCall):
+    calls: List[ToolCall] = Field(default_factory=list, description="Every tool call needed for the request, in order.")
+
+    def planned_calls(self) -> List[ToolCall]:
+        """
+        The tool plan; a single top-level `tool` (the older response format) is a one-call plan.
+        """
+        if self.calls:
+            return [call for call in self.calls if call.tool and call.tool != "none"]
+        if self.tool and self.tool != "none":
+            return [ToolCall(tool=self.tool, provided=self.provided, missing=self.missing)]
+        return []
+
 class ChatQuery(BaseModel):
     query: str
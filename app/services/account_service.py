@@ -1,8 +1,30 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.db.models import Account
+from app.db.models import Account, Transaction
 from app.exceptions import AccountNotFound
+from app.services.context_service import BankingContextService
+from app.services.account_numbers import account_number_allocator
+from app.services.read_cache import ReadCache
 
 class AccountService:
+
+    RECENT_TRANSACTIONS = 5
+    RECENT_WINDOW = timedelta(days=90)
+    ALLOCATION_ATTEMPTS = 3
+    # Postgres' name for the UniqueConstraint on accounts.account_number.
+    ACCOUNT_NUMBER_CONSTRAINT = "accounts_account_number_key"
+
+    @staticmethod
+    def to_dict(account: Account) -> dict:
+        return {
+            "account_id": account.account_id,
+            "balance": account.balance,
+            "account_type": account.account_type,
+            "currency": account.currency,
+            "account_number": account.account_number,
+        }
     
     @staticmethod
     def get_account_details(account_id: str, db: Session):
@@ -12,13 +34,7 @@ class AccountService:
         account = db.query(Account).filter(Account.account_id == account_id).first()
         if not account:
             raise AccountNotFound(f"Account with ID {account_id} not found.")
-        return {
-            "account_id": account.account_id,
-            "balance": account.balance,
-            "account_type": account.account_type,
-            "currency": account.currency,
-            "account_number": account.account_number,
-        }
+        return AccountService.to_dict(account)
     
     @staticmethod
     def update_account_details(account_id: str, details: dict, db: Session):
@@ -28,20 +44,22 @@ class AccountService:
         account = db.query(Account).filter(Account.account_id == account_id).first()
         if not account:
             raise AccountNotFound(f"Account with ID {account_id} not found.")
-        
+        return AccountService.update_account(account, details, db)
+
+    @staticmethod
+    def update_account(account: Account, details: dict, db: Session):
+        """
+        Update an already loaded account.
+        """
         for key, value in details.items():
             setattr(account, key, value)
         
         db.commit()
         db.refresh(account)
+        ReadCache.invalidate_account(account.user_id, account.account_id, account.account_number)
+        BankingContextService.refresh(account.user_id, db)
         
-        return {
-            "account_id": account.account_id,
-            "balance": account.balance,
-            "account_type": account.account_type,
-            "currency": account.currency,
-            "account_number": account.account_number,
-        }
+        return AccountService.to_dict(account)
     
     @staticmethod
     def close_account(account_id: str, db: Session):
@@ -51,33 +69,120 @@ class AccountService:
         account = db.query(Account).filter(Account.account_id == account_id).first()
         if not account:
             raise AccountNotFound(f"Account with ID {account_id} not found.")
-        
+        return AccountService.close(account, db)
+
+    @staticmethod
+    def close(account: Account, db: Session):
+        """
+        Close an already loaded account.
+        """
+        account_id = account.account_id
+        user_id = account.user_id
+        account_number = account.account_number
         db.delete(account)
         db.commit()
+        ReadCache.invalidate_account(user_id, account_id, account_number)
+        BankingContextService.refresh(user_id, db)
         
         return {"message": f"Account with ID {account_id} has been closed."}
+
+    @staticmethod
+    def list_accounts_with_activity(user_id, db: Session, account_number: str | None = None):
+        """
+        `load_accounts_with_activity`, read-through cached per user.
+        """
+        return ReadCache.read_through(
+            f"user:{user_id}",
+            f"accounts:{account_number or '*'}",
+            lambda: AccountService.load_accounts_with_activity(user_id, db, account_number),
+        )
+
+    @staticmethod
+    def load_accounts_with_activity(user_id, db: Session, account_number: str | None = None):
+        """
+        The user's active accounts with their balances and most recent outgoing
+        transactions, fetched in a single query: recent transactions are ranked per
+        account with a window function and left-joined onto the accounts.
+        """
+        account_filter = [Account.user_id == user_id, Account.is_active == True]
+        if account_number is not None:
+            account_filter.append(Account.account_number == account_number)
+
+        ranked = db.query(
+            Transaction.transaction_id,
+            Transaction.from_account_id,
+            Transaction.to_account_number,
+            Transaction.amount,
+            Transaction.status,
+            Transaction.created_at,
+            func.row_number().over(
+                partition_by=Transaction.from_account_id,
+                order_by=Transaction.created_at.desc(),
+            ).label("rank"),
+        ).join(Account, Account.account_id == Transaction.from_account_id).filter(
+            *account_filter,
+            Transaction.created_at >= datetime.utcnow() - AccountService.RECENT_WINDOW,
+        ).subquery()
+
+        rows = db.query(
+            Account.account_id,
+            Account.account_number,
+            Account.account_type,
+            Account.balance,
+            Account.currency,
+            ranked.c.transaction_id,
+            ranked.c.to_account_number,
+            ranked.c.amount,
+            ranked.c.status,
+            ranked.c.created_at,
+        ).outerjoin(ranked, and_(
+            ranked.c.from_account_id == Account.account_id,
+            ranked.c.rank <= AccountService.RECENT_TRANSACTIONS,
+        )).filter(*account_filter).order_by(Account.account_number, ranked.c.created_at.desc()).all()
+
+        accounts = {}
+        for row in rows:
+            account = accounts.setdefault(row.account_id, {
+                "account_number": row.account_number,
+                "account_type": row.account_type,
+                "balance": row.balance,
+                "currency": row.currency,
+                "recent_transactions": [],
+            })
+            if row.transaction_id is not None:
+                account["recent_transactions"].append({
+                    "transaction_id": row.transaction_id,
+                    "to_account_number": row.to_account_number,
+                    "amount": row.amount,
+                    "status": row.status.value if hasattr(row.status, "value") else row.status,
+                    "created_at": row.created_at,
+                })
+        return list(accounts.values())
     
     @staticmethod
     def create_account(account_data: dict, db: Session):
         """
         Create a new account.
         """
-        import uuid 
-        generated_account_number = str(uuid.uuid4().int)[0:12]  # Example: 12-digit unique number
-
-        new_account = Account(
-            **account_data,
-            account_number=generated_account_number,
-        )
-        db.add(new_account)
-        db.commit()
+        for attempt in range(AccountService.ALLOCATION_ATTEMPTS):
+            new_account = Account(
+                **account_data,
+                account_number=account_number_allocator.allocate(db),
+            )
+            db.add(new_account)
+            try:
+                db.commit()
+                break
+            except IntegrityError as exc:
+                # Only possible against a legacy random number that happens to match;
+                # any other violation is a real error.
+                db.rollback()
+                constraint = getattr(getattr(exc.orig, "diag", None), "constraint_name", None)
+                if constraint != AccountService.ACCOUNT_NUMBER_CONSTRAINT or attempt == AccountService.ALLOCATION_ATTEMPTS - 1:
+                    raise
         db.refresh(new_account)
+        ReadCache.invalidate_account(new_account.user_id, new_account.account_id, new_account.account_number)
+        BankingContextService.refresh(new_account.user_id, db)
 
-        return {
-            "account_id": new_account.account_id,
-            "balance": new_account.balance,
-            "account_type": new_account.account_type,
-            "currency": new_account.currency,
-            "account_number": new_account.account_number,
-        }
+        return AccountService.to_dict(new_account)
 
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import logging
+import uuid
+from contextlib import asynccontextmanager
+
+import orjson
+
+from app.core.config import config
+from app.core.redis_client import redis_client
+from app.exceptions import TurnSuperseded
+
+logger = logging.getLogger(__name__)
+
+_RELEASE = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+_RENEW = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+
+class ChatTurnService:
+    """
+    Serializes chat turns per session across workers.
+
+    Every new message takes the next turn number of its session and waits for the
+    session's Redis lock. A turn whose number is no longer the latest has been superseded
+    by a newer message: it gives up while waiting, and its graph invocation is cancelled
+    while running. A message identical to one still in flight, or answered within the
+    last CHAT_COALESCE_WINDOW seconds, takes no turn at all and shares its result.
+    """
+
+    @staticmethod
+    def _key(session_id, name: str) -> str:
+        return f"chat:turn:{session_id}:{name}"
+
+    @staticmethod
+    def inflight_ttl() -> int:
+        """
+        Lifetime of an in-flight marker: long enough to cover the wait for the session
+        lock plus one lock period, after which the running turn renews it.
+        """
+        return int(config.CHAT_TURN_WAIT_TIMEOUT + config.CHAT_TURN_LOCK_TTL)
+
+    @staticmethod
+    def fingerprint(query: str) -> str:
+        return hashlib.sha1(query.strip().encode()).hexdigest()
+
+    @staticmethod
+    async def claim(session_id, fingerprint: str) -> int | None:
+        """
+        Take a turn number for a new message, or None if an identical message is already
+        in flight (or just answered) and this one should wait for its result.
+        """
+        first = await redis_client.set(
+            ChatTurnService._key(session_id, f"inflight:{fingerprint}"), 1,
+            nx=True, ex=ChatTurnService.inflight_ttl(),
+        )
+        if not first:
+            return None
+        seq_key = ChatTurnService._key(session_id, "seq")
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(seq_key)
+        pipe.expire(seq_key, config.SESSION_IDLE_TIMEOUT * 2)
+        turn, _ = await pipe.execute()
+        return turn
+
+    @staticmethod
+    async def latest(session_id) -> int:
+        return int(await redis_client.get(ChatTurnService._key(session_id, "seq")) or 0)
+
+    @staticmethod
+    async def publish_result(session_id, fingerprint: str, result: dict):
+        """
+        Share the result for CHAT_COALESCE_WINDOW seconds; the in-flight marker goes with
+        it, so a later identical message runs as a new turn.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(
+            ChatTurnService._key(session_id, f"result:{fingerprint}"),
+            orjson.dumps(result),
+            ex=config.CHAT_COALESCE_WINDOW,
+        )
+        pipe.expire(ChatTurnService._key(session_id, f"inflight:{fingerprint}"), config.CHAT_COALESCE_WINDOW)
+        await pipe.execute()
+
+    @staticmethod
+    async def abandon(session_id, fingerprint: str):
+        """
+        Let an identical resubmission run as a new turn after this one failed.
+        """
+        await redis_client.delete(ChatTurnService._key(session_id, f"inflight:{fingerprint}"))
+
+    @staticmethod
+    async def wait_for_result(session_id, fingerprint: str) -> dict | None:
+        """
+        The result of the identical in-flight message, or None if that turn failed, was
+        superseded or did not finish within CHAT_TURN_WAIT_TIMEOUT.
+        """
+        result_key = ChatTurnService._key(session_id, f"result:{fingerprint}")
+        inflight_key = ChatTurnService._key(session_id, f"inflight:{fingerprint}")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.CHAT_TURN_WAIT_TIMEOUT
+        while loop.time() < deadline:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.get(result_key)
+            pipe.exists(inflight_key)
+            raw, inflight = await pipe.execute()
+            if raw:
+                return orjson.loads(raw)
+            if not inflight:
+                return None
+            await asyncio.sleep(config.CHAT_TURN_POLL_INTERVAL)
+        return None
+
+    @staticmethod
+    @asynccontextmanager
+    async def serialized(session_id, turn: int, fingerprint: str | None = None):
+        """
+        Hold the session's turn lock for the body, renewing it (and the in-flight marker
+        of `fingerprint`) while the body runs. Yields a `TurnGuard`; raises TurnSuperseded
+        if a newer turn arrives first.
+        """
+        lock_key = ChatTurnService._key(session_id, "lock")
+        token = uuid.uuid4().hex
+        ttl_ms = int(config.CHAT_TURN_LOCK_TTL * 1000)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.CHAT_TURN_WAIT_TIMEOUT
+
+        while not await redis_client.set(lock_key, token, nx=True, px=ttl_ms):
+            if await ChatTurnService.latest(session_id) > turn or loop.time() >= deadline:
+                raise TurnSuperseded()
+            await asyncio.sleep(config.CHAT_TURN_POLL_INTERVAL)
+
+        guard = TurnGuard(session_id, turn, fingerprint)
+        renewer = asyncio.create_task(guard.renew(lock_key, token, ttl_ms))
+        try:
+            yield guard
+        finally:
+            renewer.cancel()
+            await _RELEASE(keys=[lock_key], args=[token])
+
+
+class TurnGuard:
+    """
+    Handle on a running turn: `cancellable` runs the expensive part of the turn and
+    cancels it as soon as a newer message for the session arrives.
+    """
+
+    def __init__(self, session_id, turn: int, fingerprint: str | None = None):
+        self.session_id = session_id
+        self.turn = turn
+        self.fingerprint = fingerprint
+
+    async def renew(self, lock_key: str, token: str, ttl_ms: int):
+        while True:
+            await asyncio.sleep(ttl_ms / 3000)
+            await _RENEW(keys=[lock_key], args=[token, ttl_ms])
+            if self.fingerprint:
+                # Duplicates keep waiting for this turn however long it runs.
+                await redis_client.expire(
+                    ChatTurnService._key(self.session_id, f"inflight:{self.fingerprint}"),
+                    ChatTurnService.inflight_ttl(),
+                )
+
+    async def cancellable(self, coro):
+        task = asyncio.ensure_future(coro)
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=config.CHAT_TURN_POLL_INTERVAL)
+                if done:
+                    return task.result()
+                if await ChatTurnService.latest(self.session_id) > self.turn:
+                    logger.info("Cancelling turn %s of session %s: superseded", self.turn, self.session_id)
+                    raise TurnSuperseded()
+        finally:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,88 @@
+import orjson
+import logging
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import redis_client, sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class BankingContextService:
+    """
+    Per-user banking context (active accounts and recent transactions) kept in Redis for
+    the duration of a chat session, so the agent does not need a tool call to learn
+    things it already knows. Account and transaction mutations write it through.
+    """
+
+    TTL_SECONDS = 1800
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"user:{user_id}:banking_context"
+
+    @staticmethod
+    def build(user_id, db: Session) -> dict:
+        """
+        Load the context from the database: the same accounts and per-account recent
+        transactions the accounts endpoint returns, so the agent can answer from it.
+        """
+        from app.services.account_service import AccountService
+        accounts = AccountService.load_accounts_with_activity(user_id, db)
+        return {
+            "accounts": [
+                {
+                    "account_number": account["account_number"],
+                    "account_type": account["account_type"],
+                    "balance": float(account["balance"]),
+                    "currency": account["currency"],
+                    "recent_transactions": [
+                        {
+                            "transaction_id": str(tx["transaction_id"]),
+                            "to_account_number": tx["to_account_number"],
+                            "amount": float(tx["amount"]),
+                            "status": tx["status"],
+                            "created_at": tx["created_at"].isoformat() if tx["created_at"] else None,
+                        }
+                        for tx in account["recent_transactions"]
+                    ],
+                }
+                for account in accounts
+            ],
+        }
+
+    @staticmethod
+    def refresh(user_id, db: Session) -> dict:
+        """
+        Rebuild the context from the database and write it to Redis. A Redis failure
+        is logged, drops the old context if it can, and never fails the caller's mutation.
+        """
+        context = BankingContextService.build(user_id, db)
+        try:
+            sync_redis_client.set(
+                BankingContextService.key(user_id),
+                orjson.dumps(context),
+                ex=BankingContextService.TTL_SECONDS,
+            )
+        except RedisError:
+            logger.warning("Could not write banking context for user %s", user_id, exc_info=True)
+            # Better no context (rebuilt on the next chat turn) than a stale one.
+            try:
+                sync_redis_client.delete(BankingContextService.key(user_id))
+            except RedisError:
+                logger.warning("Could not drop stale banking context for user %s", user_id, exc_info=True)
+        return context
+
+    @staticmethod
+    async def get(user_id: UUID) -> dict | None:
+        """
+        Read the cached context, or None if it is missing or Redis is unavailable.
+        """
+        try:
+            raw = await redis_client.get(BankingContextService.key(user_id))
+        except RedisError:
+            logger.warning("Could not read banking context for user %s", user_id, exc_info=True)
+            return None
+        return orjson.loads(raw) if raw else None
@@ -0,0 +1,66 @@
+import orjson
+import logging
+
+from redis.exceptions import RedisError
+
+from app.core.redis_client import redis_client, sync_redis_client
+from app.services.read_cache import _SET_IF_GENERATION
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePageCache:
+    """
+    Redis cache of transcript pages for a session that is still active. All pages of a
+    session live in one hash so a new message drops them with a single DEL. As with
+    ReadCache, each session has a generation counter bumped on invalidation, and a page
+    is only written back if it was loaded under the current generation.
+    """
+
+    TTL_SECONDS = 300
+
+    @staticmethod
+    def key(session_id) -> str:
+        return f"chat:messages:{session_id}"
+
+    @staticmethod
+    def generation_key(session_id) -> str:
+        return f"chat:messages:{session_id}:gen"
+
+    @staticmethod
+    def get(session_id, page: str) -> tuple[dict | None, str | None]:
+        """
+        The cached page (or None) and the session's generation, to pass to `set`.
+        """
+        try:
+            pipe = sync_redis_client.pipeline(transaction=False)
+            pipe.hget(MessagePageCache.key(session_id), page)
+            pipe.get(MessagePageCache.generation_key(session_id))
+            raw, generation = pipe.execute()
+        except RedisError:
+            logger.warning("Could not read message page cache for session %s", session_id, exc_info=True)
+            return None, None
+        return (orjson.loads(raw) if raw else None), generation
+
+    @staticmethod
+    def set(session_id, page: str, value: dict, generation: str | None):
+        try:
+            _SET_IF_GENERATION(
+                keys=[MessagePageCache.key(session_id), MessagePageCache.generation_key(session_id)],
+                args=[generation or "", page, orjson.dumps(value), MessagePageCache.TTL_SECONDS],
+            )
+        except RedisError:
+            logger.warning("Could not write message page cache for session %s", session_id, exc_info=True)
+
+    @staticmethod
+    async def invalidate(session_id):
+        generation_key = MessagePageCache.generation_key(session_id)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.delete(MessagePageCache.key(session_id))
+            pipe.incr(generation_key)
+            # Only has to outlive a page load in progress.
+            pipe.expire(generation_key, MessagePageCache.TTL_SECONDS)
+            await pipe.execute()
+        except RedisError:
+            logger.warning("Could not invalidate message page cache for session %s", session_id, exc_info=True)
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import orjson
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import config
+from app.core.metrics import OUTBOX_BACKLOG, OUTBOX_PUBLISHED, OUTBOX_RELAY_LAG, STREAM_GROUP_LAG, STREAM_GROUP_PENDING
+from app.core.redis_client import redis_client, sync_redis_client
+from app.db.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Held for each relay batch so only one worker publishes at a time and the stream keeps
+# the outbox order.
+RELAY_LOCK_ID = 731_048
+
+
+class OutboxService:
+    """
+    Transactional outbox: events are added to the caller's session and commit (or roll
+    back) with the change they describe. The relay publishes them to OUTBOX_STREAM.
+    """
+
+    @staticmethod
+    def add(db: Session, aggregate_type: str, aggregate_id, event_type: str, payload: dict) -> OutboxEvent:
+        event = OutboxEvent(
+            aggregate_type=aggregate_type,
+            aggregate_id=str(aggregate_id),
+            event_type=event_type,
+            payload=payload,
+            created_at=datetime.utcnow(),
+        )
+        db.add(event)
+        return event
+
+    @staticmethod
+    def add_transaction_event(db: Session, transaction, account) -> OutboxEvent:
+        status = getattr(transaction.status, "value", transaction.status)
+        return OutboxService.add(db, "transaction", transaction.transaction_id, f"transaction.{status}", {
+            "transaction_id": str(transaction.transaction_id),
+            "user_id": str(account.user_id),
+            "from_account_id": str(account.account_id),
+            "from_account_number": account.account_number,
+            "to_account_number": transaction.to_account_number,
+            # Exact decimal, not float: consumers aggregate these.
+            "amount": str(transaction.amount),
+            "currency": account.currency,
+            "status": status,
+            "reference_id": transaction.reference_id,
+            "created_at": transaction.created_at.isoformat(),
+        })
+
+
+def relay_batch(db: Session, batch: int) -> int:
+    """
+    Publish up to `batch` unpublished events in outbox order and mark them published.
+    Delivery is at least once: a crash between XADD and the commit publishes the batch
+    again, so consumers dedupe on `event_id`.
+    """
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": RELAY_LOCK_ID}).scalar():
+        db.rollback()
+        return 0
+
+    events = db.query(OutboxEvent).filter(
+        OutboxEvent.published_at.is_(None)
+    ).order_by(OutboxEvent.event_id).limit(batch).all()
+    if not events:
+        db.rollback()
+        OUTBOX_BACKLOG.set(0)
+        return 0
+
+    pipe = sync_redis_client.pipeline(transaction=False)
+    for event in events:
+        pipe.xadd(
+            config.OUTBOX_STREAM,
+            {
+                "event_id": str(event.event_id),
+                "event_type": event.event_type,
+                "aggregate_type": event.aggregate_type,
+                "aggregate_id": event.aggregate_id,
+                "payload": orjson.dumps(event.payload),
+            },
+            maxlen=config.OUTBOX_STREAM_MAXLEN,
+            approximate=True,
+        )
+    pipe.execute()
+
+    now = datetime.utcnow()
+    db.query(OutboxEvent).filter(
+        OutboxEvent.event_id.in_([event.event_id for event in events])
+    ).update({"published_at": now}, synchronize_session=False)
+    backlog = 0
+    if len(events) == batch:
+        backlog = db.query(func.count(OutboxEvent.event_id)).filter(OutboxEvent.published_at.is_(None)).scalar() - batch
+    db.commit()
+
+    OUTBOX_PUBLISHED.inc(len(events))
+    OUTBOX_BACKLOG.set(max(backlog, 0))
+    for event in events:
+        OUTBOX_RELAY_LAG.observe((now - event.created_at).total_seconds())
+    return len(events)
+
+
+def purge_published(db: Session, batch: int) -> int:
+    """
+    Delete up to `batch` events published more than OUTBOX_RETENTION_HOURS ago.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=config.OUTBOX_RETENTION_HOURS)
+    expired = select(OutboxEvent.event_id).where(
+        OutboxEvent.published_at.isnot(None),
+        OutboxEvent.published_at < cutoff,
+    ).limit(batch)
+    deleted = db.query(OutboxEvent).filter(
+        OutboxEvent.event_id.in_(expired)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def consumer_groups() -> list[str]:
+    return [group.strip() for group in config.OUTBOX_CONSUMER_GROUPS.split(",") if group.strip()]
+
+
+def ensure_groups():
+    """
+    Create the configured consumer groups. New groups start at the beginning of the
+    stream, so they see everything still retained.
+    """
+    for group in consumer_groups():
+        try:
+            sync_redis_client.xgroup_create(config.OUTBOX_STREAM, group, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+
+def record_group_lag():
+    """
+    Export per-group lag (entries not yet delivered) and pending (delivered, not acked).
+    """
+    for info in sync_redis_client.xinfo_groups(config.OUTBOX_STREAM):
+        STREAM_GROUP_PENDING.labels(group=info["name"]).set(info["pending"])
+        # `lag` is only reported by Redis 7+, and is None when Redis cannot tell.
+        if info.get("lag") is not None:
+            STREAM_GROUP_LAG.labels(group=info["name"]).set(info["lag"])
+
+
+def run_relay() -> int:
+    from app.db.database import SessionLocal
+    db = SessionLocal()
+    try:
+        published = relay_batch(db, config.OUTBOX_BATCH_SIZE)
+        if not published:
+            purge_published(db, config.OUTBOX_BATCH_SIZE)
+        return published
+    finally:
+        db.close()
+
+
+async def relay_loop():
+    """
+    Lifespan task: publish the outbox. Polls every OUTBOX_POLL_INTERVAL seconds and
+    drains a backlog without waiting between full batches.
+    """
+    groups_ready = False
+    while True:
+        published = 0
+        try:
+            if not groups_ready:
+                await asyncio.to_thread(ensure_groups)
+                groups_ready = True
+            published = await asyncio.to_thread(run_relay)
+            await asyncio.to_thread(record_group_lag)
+        except Exception:
+            logger.warning("Outbox relay failed", exc_info=True)
+        if published < config.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(config.OUTBOX_POLL_INTERVAL)
+
+
+async def consume(group: str, consumer: str, handler, count: int = 100):
+    """
+    Deliver events from OUTBOX_STREAM to `handler(event)` as member `consumer` of
+    `group`, acking each one the handler returns for. Entries left unacked by a crashed
+    or failing consumer are claimed again after OUTBOX_CLAIM_IDLE seconds, so handlers
+    must be idempotent on `event_id`.
+    """
+    stream = config.OUTBOX_STREAM
+    while True:
+        try:
+            _, entries, *_ = await redis_client.xautoclaim(
+                stream, group, consumer,
+                min_idle_time=int(config.OUTBOX_CLAIM_IDLE * 1000), start_id="0-0", count=count,
+            )
+            if not entries:
+                response = await redis_client.xreadgroup(group, consumer, {stream: ">"}, count=count, block=5000)
+                entries = response[0][1] if response else []
+        except RedisError:
+            logger.warning("Outbox consumer %s/%s disconnected", group, consumer, exc_info=True)
+            await asyncio.sleep(1)
+            continue
+
+        for entry_id, fields in entries:
+            if not fields:  # trimmed from the stream while pending
+                await redis_client.xack(stream, group, entry_id)
+                continue
+            event = dict(fields, payload=orjson.loads(fields["payload"]))
+            try:
+                await handler(event)
+            except Exception:
+                logger.warning("Outbox handler for %s failed on %s", group, event["event_id"], exc_info=True)
+                continue
+            await redis_client.xack(stream, group, entry_id)
+
+
+if __name__ == "__main__":
+    ensure_groups()
+    print(run_relay())
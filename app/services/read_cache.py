@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.core.config import config
+from app.core.metrics import record_cache
+from app.core.redis_client import redis_client, sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Write a loaded value only if the scope was not invalidated while it was loading;
+# otherwise a load racing a mutation would put the old value back for READ_CACHE_TTL.
+_SET_IF_GENERATION = sync_redis_client.register_script("""
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+""")
+_ASET_IF_GENERATION = redis_client.register_script(_SET_IF_GENERATION.script)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+class ReadCache:
+    """
+    Two-tier read-through cache for read-only banking reads: a small in-process LRU in
+    front of Redis. Entries live in scopes ("user:<id>", "account:<id or number>",
+    "transaction:<id>"); each scope is one Redis hash, so a mutation drops everything it
+    affects with one DEL and a pub/sub message that clears the other workers' LRUs.
+    Values round-trip through JSON in both tiers, so hits look the same from either.
+
+    Each scope also has a generation counter, bumped by every invalidation; a loaded
+    value is only written back if the generation it was loaded under is still current.
+    """
+
+    _local: OrderedDict[str, dict] = OrderedDict()
+    # Bumped on every local drop; the same check for the in-process tier.
+    _local_epoch = 0
+    # Sync reads run on threadpool threads.
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(scope: str) -> str:
+        return f"cache:{scope}"
+
+    @staticmethod
+    def generation_key(scope: str) -> str:
+        return f"cache:{scope}:gen"
+
+    @staticmethod
+    def _get_local(scope: str, field: str):
+        with ReadCache._lock:
+            entries = ReadCache._local.get(scope)
+            if entries is None or field not in entries:
+                return None
+            expires, value = entries[field]
+            if expires < time.monotonic():
+                del entries[field]
+                return None
+            ReadCache._local.move_to_end(scope)
+            return value
+
+    @staticmethod
+    def _set_local(scope: str, field: str, value, epoch: int):
+        with ReadCache._lock:
+            if epoch != ReadCache._local_epoch:
+                return
+            ReadCache._local.setdefault(scope, {})[field] = (time.monotonic() + config.READ_CACHE_LOCAL_TTL, value)
+            ReadCache._local.move_to_end(scope)
+            while len(ReadCache._local) > config.READ_CACHE_LOCAL_SIZE:
+                ReadCache._local.popitem(last=False)
+
+    @staticmethod
+    def drop_local(*scopes: str):
+        with ReadCache._lock:
+            ReadCache._local_epoch += 1
+            for scope in scopes:
+                ReadCache._local.pop(scope, None)
+
+    @staticmethod
+    def read_through(scope: str, field: str, loader, ttl: int | None = None, cacheable=None):
+        """
+        Return the cached value, or call `loader()` and cache its result unless
+        `cacheable(result)` says otherwise.
+        """
+        if not config.READ_CACHE_ENABLED:
+            return loader()
+        epoch = ReadCache._local_epoch
+        value = ReadCache._get_local(scope, field)
+        if value is not None:
+            record_cache("read_local", True)
+            return value
+        record_cache("read_local", False)
+
+        try:
+            pipe = sync_redis_client.pipeline(transaction=False)
+            pipe.hget(ReadCache.key(scope), field)
+            pipe.get(ReadCache.generation_key(scope))
+            raw, generation = pipe.execute()
+        except RedisError:
+            logger.warning("Could not read cache scope %s", scope, exc_info=True)
+            raw = generation = None
+        record_cache("read_redis", raw is not None)
+        if raw is not None:
+            value = orjson.loads(raw)
+            ReadCache._set_local(scope, field, value, epoch)
+            return value
+
+        raw = orjson.dumps(loader(), default=_default)
+        value = orjson.loads(raw)
+        if cacheable is None or cacheable(value):
+            try:
+                _SET_IF_GENERATION(
+                    keys=[ReadCache.key(scope), ReadCache.generation_key(scope)],
+                    args=[generation or "", field, raw, ttl or config.READ_CACHE_TTL],
+                )
+            except RedisError:
+                logger.warning("Could not write cache scope %s", scope, exc_info=True)
+            ReadCache._set_local(scope, field, value, epoch)
+        return value
+
+    @staticmethod
+    async def aread_through(scope: str, field: str, loader, ttl: int | None = None, cacheable=None):
+        """
+        `read_through` for async callers; `loader` is awaited.
+        """
+        if not config.READ_CACHE_ENABLED:
+            return await loader()
+        epoch = ReadCache._local_epoch
+        value = ReadCache._get_local(scope, field)
+        if value is not None:
+            record_cache("read_local", True)
+            return value
+        record_cache("read_local", False)
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hget(ReadCache.key(scope), field)
+            pipe.get(ReadCache.generation_key(scope))
+            raw, generation = await pipe.execute()
+        except RedisError:
+            logger.warning("Could not read cache scope %s", scope, exc_info=True)
+            raw = generation = None
+        record_cache("read_redis", raw is not None)
+        if raw is not None:
+            value = orjson.loads(raw)
+            ReadCache._set_local(scope, field, value, epoch)
+            return value
+
+        raw = orjson.dumps(await loader(), default=_default)
+        value = orjson.loads(raw)
+        if cacheable is None or cacheable(value):
+            try:
+                await _ASET_IF_GENERATION(
+                    keys=[ReadCache.key(scope), ReadCache.generation_key(scope)],
+                    args=[generation or "", field, raw, ttl or config.READ_CACHE_TTL],
+                )
+            except RedisError:
+                logger.warning("Could not write cache scope %s", scope, exc_info=True)
+            ReadCache._set_local(scope, field, value, epoch)
+        return value
+
+    @staticmethod
+    def invalidate(*scopes: str):
+        """
+        Drop scopes after a mutation, here and (through pub/sub) in every other worker.
+        """
+        ReadCache.drop_local(*scopes)
+        try:
+            pipe = sync_redis_client.pipeline()
+            pipe.delete(*(ReadCache.key(scope) for scope in scopes))
+            for scope in scopes:
+                pipe.incr(ReadCache.generation_key(scope))
+                # Only has to outlive a load in progress.
+                pipe.expire(ReadCache.generation_key(scope), config.READ_CACHE_TTL)
+            pipe.publish(INVALIDATION_CHANNEL, orjson.dumps(scopes))
+            pipe.execute()
+        except RedisError:
+            logger.warning("Could not invalidate cache scopes %s", scopes, exc_info=True)
+
+    @staticmethod
+    def invalidate_account(user_id, account_id, account_number):
+        ReadCache.invalidate(f"user:{user_id}", f"account:{account_id}", f"account:{account_number}")
+
+
+async def invalidation_listener():
+    """
+    Lifespan task: clear this worker's LRU entries for scopes invalidated elsewhere. If
+    a message is missed while reconnecting, READ_CACHE_LOCAL_TTL bounds the staleness.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    ReadCache.drop_local(*orjson.loads(message["data"]))
+        except RedisError:
+            logger.warning("Cache invalidation listener disconnected", exc_info=True)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.reset()
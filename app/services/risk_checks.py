@@ -0,0 +1,153 @@
+import logging
+import math
+import time
+from decimal import Decimal
+
+from redis.exceptions import RedisError
+
+from app.core.config import config
+from app.core.metrics import RISK_CHECK_LATENCY, RISK_DECISIONS
+from app.core.redis_client import sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Decisions, least to most severe. "review" lets the transfer through, flagged.
+ALLOW, REVIEW, BLOCK = "allow", "review", "block"
+_SEVERITY = {ALLOW: 0, REVIEW: 1, BLOCK: 2}
+
+# Window members are "<transaction_id>:<amount>" scored by time in ms. Returns the
+# transfers and total amount in the window, whether the payee is known and the amount
+# histogram. The sum is returned as a string: Redis truncates Lua numbers to integers.
+_CHECK = sync_redis_client.register_script("""
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local entries = redis.call('ZRANGEBYSCORE', KEYS[1], now - tonumber(ARGV[1]), '+inf')
+local total = 0
+for _, member in ipairs(entries) do
+    total = total + tonumber(string.match(member, ':([^:]+)$'))
+end
+return {#entries, tostring(total), redis.call('SISMEMBER', KEYS[2], ARGV[2]), redis.call('HGETALL', KEYS[3])}
+""")
+_RECORD = sync_redis_client.register_script("""
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+redis.call('ZADD', KEYS[1], now, ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+redis.call('HINCRBY', KEYS[3], ARGV[4], 1)
+redis.call('EXPIRE', KEYS[3], ARGV[5])
+return 1
+""")
+
+
+def parse_rule_actions(spec: str) -> dict[str, str]:
+    """
+    "velocity_count:block,new_payee:review" -> {"velocity_count": "block", "new_payee": "review"}.
+    Rules left out are off.
+    """
+    actions = {}
+    for item in spec.split(","):
+        if item.strip():
+            rule, _, action = item.partition(":")
+            actions[rule.strip()] = action.strip() or BLOCK
+    return actions
+
+
+def amount_bucket(amount) -> int:
+    """
+    Power-of-two bucket of an amount, for the per-account amount histogram.
+    """
+    return int(math.log2(max(float(amount), 1.0)))
+
+
+class RiskService:
+    """
+    Velocity and fraud pre-checks for transfers, run before the debit.
+
+    Each account keeps three Redis structures, updated when a transfer completes: a
+    sliding window of recent transfers, the set of payees it has paid, and a histogram of
+    its transfer amounts. A check reads all three in one script call and applies the
+    rules in RISK_RULE_ACTIONS to them, so it costs one round trip and no SQL.
+    """
+
+    @staticmethod
+    def _keys(account_id) -> list[str]:
+        # The hash tag keeps an account's keys in one cluster slot.
+        return [f"risk:{{{account_id}}}:window", f"risk:{{{account_id}}}:payees", f"risk:{{{account_id}}}:amounts"]
+
+    @staticmethod
+    def evaluate(amount: Decimal, window_count: int, window_amount: Decimal, known_payee: bool, histogram: dict[int, int]) -> list[str]:
+        """
+        Names of the rules this transfer trips, given the account's recent activity.
+        """
+        hits = []
+        if window_count + 1 > config.RISK_MAX_TRANSFERS_PER_WINDOW:
+            hits.append("velocity_count")
+        if window_amount + amount > config.RISK_MAX_AMOUNT_PER_WINDOW:
+            hits.append("velocity_amount")
+        if not known_payee and amount > config.RISK_NEW_PAYEE_MAX_AMOUNT:
+            hits.append("new_payee")
+        history = sum(histogram.values())
+        if history >= config.RISK_MIN_HISTORY:
+            bucket = amount_bucket(amount)
+            as_large = sum(count for b, count in histogram.items() if b >= bucket)
+            if as_large / history < config.RISK_UNUSUAL_AMOUNT_SHARE:
+                hits.append("unusual_amount")
+        return hits
+
+    @staticmethod
+    def check(account_id, to_account_number: str, amount: Decimal) -> dict:
+        """
+        Risk decision for a transfer, as stored in the transaction's message_metadata:
+        {"decision": "allow" | "review" | "block", "rules": [...], "checked_ms": ...}.
+        If Redis is unavailable the transfer is allowed (or blocked, with
+        RISK_FAIL_OPEN off) and marked "unchecked".
+        """
+        if not config.RISK_CHECKS_ENABLED:
+            return {"decision": ALLOW, "rules": [], "skipped": True}
+
+        start = time.perf_counter()
+        try:
+            count, total, known_payee, flat = _CHECK(
+                keys=RiskService._keys(account_id),
+                args=[int(config.RISK_WINDOW_SECONDS * 1000), to_account_number],
+            )
+        except RedisError:
+            logger.warning("Risk check for account %s failed", account_id, exc_info=True)
+            decision = ALLOW if config.RISK_FAIL_OPEN else BLOCK
+            RISK_DECISIONS.labels(decision=decision, rule="unchecked").inc()
+            return {"decision": decision, "rules": ["unchecked"]}
+
+        histogram = {int(flat[i]): int(flat[i + 1]) for i in range(0, len(flat), 2)}
+        hits = RiskService.evaluate(amount, int(count), Decimal(total), bool(known_payee), histogram)
+        actions = parse_rule_actions(config.RISK_RULE_ACTIONS)
+        decision = max((actions.get(rule, ALLOW) for rule in hits), key=_SEVERITY.get, default=ALLOW)
+        elapsed = time.perf_counter() - start
+
+        RISK_CHECK_LATENCY.observe(elapsed)
+        for rule in hits or ["none"]:
+            RISK_DECISIONS.labels(decision=decision, rule=rule).inc()
+        return {"decision": decision, "rules": hits, "checked_ms": round(elapsed * 1000, 3)}
+
+    @staticmethod
+    def record(account_id, transaction_id, to_account_number: str, amount: Decimal):
+        """
+        Add a completed transfer to the account's window, payees and histogram.
+        """
+        if not config.RISK_CHECKS_ENABLED:
+            return
+        try:
+            _RECORD(
+                keys=RiskService._keys(account_id),
+                args=[
+                    f"{transaction_id}:{amount}",
+                    int(config.RISK_WINDOW_SECONDS * 1000),
+                    to_account_number,
+                    amount_bucket(amount),
+                    config.RISK_HISTORY_DAYS * 86400,
+                ],
+            )
+        except RedisError:
+            logger.warning("Could not record transfer %s for risk checks", transaction_id, exc_info=True)
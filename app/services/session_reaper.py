@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import orjson
+from sqlalchemy import exists, text
+from sqlalchemy.orm import Session
+
+from app.core.config import config
+from app.core.metrics import REAPER_BYTES, REAPER_ROWS
+from app.core.redis_client import sync_redis_client
+from app.db.models import ChatSession, Message
+from app.db.schemas import SenderEnum
+from app.services.session_service import ActiveSessionService
+
+logger = logging.getLogger(__name__)
+
+# Held for the database part of a run so only one worker reaps at a time.
+REAPER_LOCK_ID = 731_040
+HISTORY_KEY = "chat:history:{user_id}:{session_id}"
+
+
+def end_idle_sessions(db: Session, cutoff: datetime, batch: int) -> list:
+    """
+    End up to `batch` active sessions with no message since `cutoff`. The message probe
+    only touches partitions newer than the cutoff.
+    """
+    recent_message = exists().where(
+        Message.session_id == ChatSession.session_id,
+        Message.timestamp >= cutoff,
+    )
+    idle = db.query(ChatSession.session_id, ChatSession.user_id, ChatSession.started_at).filter(
+        ChatSession.is_active == True,
+        ChatSession.started_at < cutoff,
+        ~recent_message,
+    ).limit(batch).with_for_update(skip_locked=True).all()
+
+    if idle:
+        db.query(ChatSession).filter(
+            ChatSession.session_id.in_([row.session_id for row in idle])
+        ).update({
+            "is_active": False,
+            "ended_at": datetime.utcnow()
+        }, synchronize_session=False)
+    return idle
+
+
+def compact_history(db: Session, sessions: list) -> tuple[int, list[str]]:
+    """
+    Move the Redis history of ended sessions into the transcript. Every chat turn already
+    writes its messages to the database, so only sessions with no transcript rows at all
+    (history written before that) are copied; the Redis keys are returned for deletion.
+    """
+    keys = [HISTORY_KEY.format(user_id=row.user_id, session_id=row.session_id) for row in sessions]
+    if not keys:
+        return 0, []
+    histories = sync_redis_client.mget(keys)
+
+    with_history = [row for row, raw in zip(sessions, histories) if raw]
+    if not with_history:
+        return 0, []
+    transcribed = {
+        session_id for (session_id,) in db.query(Message.session_id).filter(
+            Message.session_id.in_([row.session_id for row in with_history]),
+            Message.timestamp >= min(row.started_at for row in with_history),
+        ).distinct()
+    }
+
+    compacted = 0
+    for row, raw in zip(sessions, histories):
+        if not raw or row.session_id in transcribed:
+            continue
+        for offset, entry in enumerate(orjson.loads(raw)):
+            db.add(Message(
+                session_id=row.session_id,
+                sender=SenderEnum.user if entry["sender"] == "user" else SenderEnum.bot,
+                content=entry["content"],
+                timestamp=row.started_at + timedelta(microseconds=offset),
+            ))
+            compacted += 1
+    return compacted, [key for key, raw in zip(keys, histories) if raw]
+
+
+def delete_keys(keys: list[str]) -> int:
+    """
+    Delete keys and return the memory they held.
+    """
+    if not keys:
+        return 0
+    pipe = sync_redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    for key in keys:
+        pipe.delete(key)
+    results = pipe.execute()
+    return sum(size or 0 for size in results[:len(keys)])
+
+
+def _session_id(key: str) -> UUID | None:
+    try:
+        return UUID(key.rsplit(":", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def sweep_orphaned_keys(db: Session, batch: int) -> tuple[int, int]:
+    """
+    SCAN chat history keys in batches of `batch` and delete those whose session is not
+    active (ended by an older code path, or deleted). Returns (keys, bytes).
+    """
+    deleted = reclaimed = 0
+    pending: list[str] = []
+
+    def flush():
+        nonlocal deleted, reclaimed
+        ids = {key: _session_id(key) for key in pending}
+        active = {
+            session_id for (session_id,) in db.query(ChatSession.session_id).filter(
+                ChatSession.session_id.in_([sid for sid in ids.values() if sid]),
+                ChatSession.is_active == True,
+            )
+        }
+        orphaned = [key for key, sid in ids.items() if sid not in active]
+        reclaimed += delete_keys(orphaned)
+        deleted += len(orphaned)
+        pending.clear()
+
+    for key in sync_redis_client.scan_iter(match=HISTORY_KEY.format(user_id="*", session_id="*"), count=batch):
+        pending.append(key)
+        if len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+    return deleted, reclaimed
+
+
+def reap(db: Session) -> dict:
+    """
+    One reaper pass: end idle sessions and compact their history, then sweep orphaned
+    Redis keys. Returns what was reclaimed.
+    """
+    report = {"sessions_ended": 0, "messages_compacted": 0, "redis_keys": 0, "redis_bytes": 0}
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": REAPER_LOCK_ID}).scalar():
+        db.rollback()
+        return report
+
+    cutoff = datetime.utcnow() - timedelta(seconds=config.SESSION_IDLE_TIMEOUT)
+    ended, stale_keys = [], []
+    while True:
+        idle = end_idle_sessions(db, cutoff, config.SESSION_REAPER_BATCH)
+        compacted, keys = compact_history(db, idle)
+        ended += idle
+        stale_keys += keys
+        report["sessions_ended"] += len(idle)
+        report["messages_compacted"] += compacted
+        if len(idle) < config.SESSION_REAPER_BATCH:
+            break
+    db.commit()
+
+    for row in ended:
+        ActiveSessionService.clear(row.user_id, row.session_id)
+    report["redis_bytes"] += delete_keys(stale_keys)
+    report["redis_keys"] += len(stale_keys)
+
+    keys, reclaimed = sweep_orphaned_keys(db, config.SESSION_REAPER_BATCH)
+    db.commit()
+    report["redis_keys"] += keys
+    report["redis_bytes"] += reclaimed
+
+    for kind in ("sessions_ended", "messages_compacted", "redis_keys"):
+        REAPER_ROWS.labels(kind).inc(report[kind])
+    REAPER_BYTES.inc(report["redis_bytes"])
+    if any(report.values()):
+        logger.info("Session reaper: %s", report)
+    return report
+
+
+def run_reaper() -> dict:
+    from app.db.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return reap(db)
+    finally:
+        db.close()
+
+
+async def reaper_loop():
+    """
+    Lifespan task: reap every SESSION_REAPER_INTERVAL seconds.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(run_reaper)
+        except Exception:
+            logger.warning("Session reaper failed", exc_info=True)
+        await asyncio.sleep(config.SESSION_REAPER_INTERVAL)
+
+
+if __name__ == "__main__":
+    print(run_reaper())
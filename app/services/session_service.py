@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import redis_client, sync_redis_client
+from app.db.models import ChatSession
+
+logger = logging.getLogger(__name__)
+
+# New session ids are UUIDv7, so their string form sorts by creation time: never let a
+# slow writer put an older session back over a newer one. Sessions created before that
+# have uuid4 ids, which are older than any v7 id but do not sort as such, so they only
+# ever replace another legacy id.
+_SET_IF_NEWER = sync_redis_client.register_script("""
+local current = redis.call('GET', KEYS[1])
+if current and string.sub(current, 15, 15) == '7' then
+    if string.sub(ARGV[1], 15, 15) ~= '7' or current > ARGV[1] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+""")
+_DELETE_IF_EQUAL = sync_redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+class ActiveSessionService:
+    """
+    Pointer to each user's active chat session, kept in Redis and written through on
+    every switch-over, so resolving the session on /chat and /support needs no database
+    read. The partial unique index uq_sessions_user_active backs it: at most one active
+    session per user.
+    """
+
+    TTL_SECONDS = 86400
+    SWITCH_ATTEMPTS = 3
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"user:{user_id}:active_session"
+
+    @staticmethod
+    def publish(user_id, session_id, replace: bool = False):
+        """
+        Point the user at `session_id`, unless the pointer already holds a newer session.
+        `replace` skips that check, for a writer that has just ended every other session.
+        """
+        try:
+            if replace:
+                sync_redis_client.set(ActiveSessionService.key(user_id), str(session_id), ex=ActiveSessionService.TTL_SECONDS)
+                return
+            _SET_IF_NEWER(
+                keys=[ActiveSessionService.key(user_id)],
+                args=[str(session_id), ActiveSessionService.TTL_SECONDS],
+                client=sync_redis_client,
+            )
+        except RedisError:
+            logger.warning("Could not write active session for user %s", user_id, exc_info=True)
+
+    @staticmethod
+    def clear(user_id, session_id):
+        """
+        Drop the pointer if it still points at `session_id` (a newer session keeps it).
+        """
+        try:
+            _DELETE_IF_EQUAL(
+                keys=[ActiveSessionService.key(user_id)],
+                args=[str(session_id)],
+                client=sync_redis_client,
+            )
+        except RedisError:
+            logger.warning("Could not clear active session for user %s", user_id, exc_info=True)
+
+    @staticmethod
+    async def get(user_id) -> UUID | None:
+        """
+        The cached active session id, or None on a miss or if Redis is unavailable.
+        """
+        try:
+            raw = await redis_client.get(ActiveSessionService.key(user_id))
+        except RedisError:
+            logger.warning("Could not read active session for user %s", user_id, exc_info=True)
+            return None
+        return UUID(raw) if raw else None
+
+    @staticmethod
+    def load(user_id, db: Session) -> UUID | None:
+        """
+        Look the active session up in the database and re-publish the pointer.
+        """
+        session_id = db.query(ChatSession.session_id).filter(
+            ChatSession.user_id == user_id,
+            ChatSession.is_active == True
+        ).scalar()
+        if session_id is not None:
+            ActiveSessionService.publish(user_id, session_id)
+        return session_id
+
+    @staticmethod
+    def start(user_id, db: Session) -> ChatSession:
+        """
+        End the user's active session and start a new one in a single transaction, then
+        publish the pointer. Two concurrent starts collide on the unique index; the loser
+        retries and ends the winner's session, so exactly one stays active.
+        """
+        for attempt in range(ActiveSessionService.SWITCH_ATTEMPTS):
+            db.query(ChatSession).filter(
+                ChatSession.user_id == user_id,
+                ChatSession.is_active == True
+            ).update({
+                "is_active": False,
+                "ended_at": datetime.utcnow()
+            }, synchronize_session=False)
+
+            new_session = ChatSession(user_id=user_id)
+            db.add(new_session)
+            try:
+                db.commit()
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt == ActiveSessionService.SWITCH_ATTEMPTS - 1:
+                    raise
+        db.refresh(new_session)
+
+        # Every other session was ended in the same transaction, so this one wins outright.
+        ActiveSessionService.publish(user_id, new_session.session_id, replace=True)
+        return new_session
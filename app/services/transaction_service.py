@@ -1,77 +1,184 @@
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
-from uuid import uuid4
+from typing import Optional
 
 from app.db.models import Transaction, TransactionStatusEnum, Account
+from app.db.ids import uuid7, uuid7_datetime
+from app.core.config import config
 from app.exceptions import AccountNotFound
 from app.schemas import TransactionCreate,TransactionOut,TransactionStatusEnum
+from app.services.context_service import BankingContextService
+from app.services.outbox import OutboxService
+from app.services.risk_checks import BLOCK, RiskService
+from app.services.read_cache import ReadCache
 
 
 class TransactionService:
+
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        return {
+            "transaction_id": row.transaction_id,
+            "from_account_id": row.from_account_id,
+            "to_account_number": row.to_account_number,
+            "amount": float(row.amount),
+            "status": row.status.value if hasattr(row.status, "value") else row.status,
+            "reference_id": row.reference_id,
+            "message_metadata": row.message_metadata,
+            "created_at": row.created_at,
+        }
     
     @staticmethod
     def create_transaction(transaction_data: TransactionCreate, db: Session):
         """
-        Create a new transaction after validating balance and account existence.
+        Create a new transaction after validating balance and account existence and
+        running the risk pre-checks. The sender row is locked until commit, so concurrent
+        transfers from one account see each other's debit and risk window.
         """
-        sender_account = db.query(Account).filter(Account.account_number == transaction_data.account_number).first()
+        sender_account = db.query(Account).filter(
+            Account.account_number == transaction_data.account_number
+        ).with_for_update().first()
         
         if not sender_account:
             raise AccountNotFound(f"Sender account with ID {transaction_data.account_number} not found.")
 
         if sender_account.balance < transaction_data.amount:
-            failed_tx = Transaction(
-                transaction_id=uuid4(),
-                from_account_id=sender_account.account_id,
-                to_account_number=transaction_data.to_account_number,
-                amount=transaction_data.amount,
-                status=TransactionStatusEnum.FAILED.value,
-                reference_id=str(uuid4()),
-                message_metadata={"reason": "Insufficient balance"},
-                created_at=datetime.utcnow()
+            return TransactionService._fail(transaction_data, sender_account, {"reason": "Insufficient balance"}, db)
+
+        risk = RiskService.check(sender_account.account_id, transaction_data.to_account_number, transaction_data.amount)
+        if risk["decision"] == BLOCK:
+            return TransactionService._fail(
+                transaction_data, sender_account,
+                {"reason": f"Blocked by risk checks: {', '.join(risk['rules'])}", "risk": risk}, db,
             )
-            db.add(failed_tx)
-            db.commit()
-            db.refresh(failed_tx)
-            return failed_tx
 
         sender_account.balance -= transaction_data.amount
 
         completed_tx = Transaction(
-            transaction_id=uuid4(),
+            transaction_id=uuid7(),
             from_account_id=sender_account.account_id,
             to_account_number=transaction_data.to_account_number,
             amount=transaction_data.amount,
             status=TransactionStatusEnum.COMPLETED.value,
-            reference_id=str(uuid4()),
-            message_metadata=transaction_data.message_metadata,
+            reference_id=str(uuid7()),
+            message_metadata={**(transaction_data.message_metadata or {}), "risk": risk},
             created_at=datetime.utcnow()
         )
         db.add(completed_tx)
+        OutboxService.add_transaction_event(db, completed_tx, sender_account)
+        # Recorded while the account row is still locked; a failed commit only makes the
+        # window stricter until the entry ages out.
+        RiskService.record(sender_account.account_id, completed_tx.transaction_id, completed_tx.to_account_number, completed_tx.amount)
         db.commit()
         db.refresh(completed_tx)
+        ReadCache.invalidate_account(sender_account.user_id, sender_account.account_id, sender_account.account_number)
+        BankingContextService.refresh(sender_account.user_id, db)
         return completed_tx
 
     @staticmethod
-    def get_transaction_by_id(transaction_id: str, db: Session):
+    def _fail(transaction_data: TransactionCreate, sender_account: Account, metadata: dict, db: Session):
+        """
+        Record a rejected transfer as a FAILED transaction. Balances are unchanged, but
+        the banking context lists failed transfers too, so it is refreshed.
+        """
+        failed_tx = Transaction(
+            transaction_id=uuid7(),
+            from_account_id=sender_account.account_id,
+            to_account_number=transaction_data.to_account_number,
+            amount=transaction_data.amount,
+            status=TransactionStatusEnum.FAILED.value,
+            reference_id=str(uuid7()),
+            message_metadata=metadata,
+            created_at=datetime.utcnow()
+        )
+        db.add(failed_tx)
+        OutboxService.add_transaction_event(db, failed_tx, sender_account)
+        db.commit()
+        db.refresh(failed_tx)
+        ReadCache.invalidate_account(sender_account.user_id, sender_account.account_id, sender_account.account_number)
+        BankingContextService.refresh(sender_account.user_id, db)
+        return failed_tx
+
+    @staticmethod
+    def get_transaction_by_id(transaction_id: str, db: Session, user_id=None):
         """
-        Retrieve a transaction by its ID.
+        Retrieve a transaction by its ID; with `user_id`, only one sent from that user's accounts.
         """
-        transaction = db.query(Transaction).filter(Transaction.transaction_id == transaction_id).first()
+        query = db.query(Transaction).filter(Transaction.transaction_id == transaction_id)
+        if user_id is not None:
+            query = query.join(Account, Account.account_id == Transaction.from_account_id).filter(Account.user_id == user_id)
+        issued_at = uuid7_datetime(transaction_id)
+        if issued_at is not None:
+            # created_at is set right after the v7 id is minted, so a small window around the
+            # id's timestamp restricts the lookup to one or two partitions.
+            query = query.filter(
+                Transaction.created_at >= issued_at - timedelta(days=1),
+                Transaction.created_at < issued_at + timedelta(days=1),
+            )
+        transaction = query.first()
         if not transaction:
             raise ValueError(f"Transaction with ID {transaction_id} not found.")
         return transaction
 
     @staticmethod
-    def list_transactions_by_account(account_number: str, db: Session):
+    def get_transaction_row(transaction_id: str, user_id, db: Session) -> dict:
+        """
+        get_transaction_by_id for one of the user's transactions as a dict, read-through
+        cached per user. Completed and failed transactions never change, so they are kept
+        for READ_CACHE_IMMUTABLE_TTL.
+        """
+        return ReadCache.read_through(
+            f"user:{user_id}:transaction:{transaction_id}",
+            "row",
+            lambda: TransactionService.row_to_dict(TransactionService.get_transaction_by_id(transaction_id, db, user_id)),
+            ttl=config.READ_CACHE_IMMUTABLE_TTL,
+            cacheable=lambda row: row["status"] != TransactionStatusEnum.PENDING.value,
+        )
+
+    @staticmethod
+    def list_transaction_rows(account_number: str, user_id, db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None):
         """
-        List all transactions from a given account.
+        `load_transaction_rows` for one of the user's accounts, read-through cached under
+        the user until their next account mutation.
         """
-        account = db.query(Account).filter(Account.account_number == account_number).first()
+        return ReadCache.read_through(
+            f"user:{user_id}",
+            f"transactions:{account_number}:{since.isoformat() if since else ''}:{until.isoformat() if until else ''}",
+            lambda: TransactionService.load_transaction_rows(account_number, db, since, until, user_id),
+        )
+
+    @staticmethod
+    def load_transaction_rows(account_number: str, db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                              user_id=None):
+        """
+        List all transactions from a given account, optionally within [since, until].
+        A time window lets Postgres prune `transactions` partitions. Selects only the
+        TransactionOut columns and returns plain dicts ready for orjson, skipping ORM
+        hydration and per-row Pydantic models on the hot list path. With `user_id`, only
+        that user's account is found.
+        """
+        account_query = db.query(Account.account_id).filter(Account.account_number == account_number)
+        if user_id is not None:
+            account_query = account_query.filter(Account.user_id == user_id)
+        account_id = account_query.scalar()
 
-        if not account:
+        if account_id is None:
             raise ValueError(f"Account with number {account_number} not found.")
 
-        transactions = db.query(Transaction).filter(Transaction.from_account_id == account.account_id).all()
-        return transactions
\ No newline at end of file
+        query = db.query(
+            Transaction.transaction_id,
+            Transaction.from_account_id,
+            Transaction.to_account_number,
+            Transaction.amount,
+            Transaction.status,
+            Transaction.reference_id,
+            Transaction.message_metadata,
+            Transaction.created_at,
+        ).filter(Transaction.from_account_id == account_id)
+        if since is not None:
+            query = query.filter(Transaction.created_at >= since)
+        if until is not None:
+            query = query.filter(Transaction.created_at < until)
+
+        return [TransactionService.row_to_dict(row) for row in query.all()]
\ No newline at end of file
@@ -1,4 +1,25 @@
-from langsmith import Client
+from functools import lru_cache
 import os
 
-client = Client(api_key = os.getenv("LANGSMITH_API_KEY"),api_url=os.getenv("LANGSMITH_ENDPOINT"))
\ No newline at end of file
+
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    LangSmith client, built on first use so importing the app does not load langsmith.
+
+    Runs are batched by app.core.tracing's exporter thread and posted with
+    batch_ingest_runs, so the client's own background queue is not needed.
+    """
+    from langsmith import Client
+    return Client(
+        api_key=os.getenv("LANGSMITH_API_KEY"),
+        api_url=os.getenv("LANGSMITH_ENDPOINT"),
+        auto_batch_tracing=False,
+    )
+
+
+def __getattr__(name):
+    # Backwards compatible `from app.shared import client`.
+    if name == "client":
+        return get_client()
+    raise AttributeError(name)
@@ -0,0 +1,98 @@
+"""
+Bulk account creation: truncated-uuid4 account numbers vs the block allocator.
+
+Each simulated worker owns its own AccountNumberAllocator (as each process would); the
+report shows insert throughput, unique-index size, sequence round trips and collisions.
+Runs against DATABASE_URL (use a scratch database); creates and drops its own table:
+
+    python -m benchmarks.bench_account_creation --accounts 200000 --workers 8
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import create_engine, event, text
+
+from app.core.config import config
+from app.services.account_numbers import AccountNumberAllocator
+
+TABLE = "bench_account_numbers"
+DDL = f"""
+CREATE UNLOGGED TABLE {TABLE} (
+    account_id UUID PRIMARY KEY,
+    account_number VARCHAR NOT NULL,
+    CONSTRAINT {TABLE}_number_key UNIQUE (account_number)
+)
+"""
+
+
+def run(engine, make_number, accounts: int, batch: int) -> dict:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(DDL))
+
+    collisions = 0
+    start = time.perf_counter()
+    for offset in range(0, accounts, batch):
+        with engine.begin() as conn:
+            params = [
+                {"account_id": uuid.uuid4(), "account_number": make_number(conn, offset + i)}
+                for i in range(min(batch, accounts - offset))
+            ]
+            inserted = conn.execute(
+                text(
+                    f"INSERT INTO {TABLE} (account_id, account_number) VALUES (:account_id, :account_number) "
+                    "ON CONFLICT (account_number) DO NOTHING"
+                ),
+                params,
+            ).rowcount
+            collisions += len(params) - inserted
+    elapsed = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        index_bytes = conn.execute(text(f"SELECT pg_relation_size('{TABLE}_number_key')")).scalar()
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+    return {
+        "accounts_per_sec": accounts / elapsed,
+        "seconds": elapsed,
+        "index_mb": index_bytes / 2**20,
+        "collisions": collisions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    engine = create_engine(config.DATABASE_URL)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SEQUENCE IF NOT EXISTS account_number_seq START WITH 1 INCREMENT BY 100 CACHE 1"))
+
+    round_trips = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_nextval(conn, cursor, statement, parameters, context, executemany):
+        nonlocal round_trips
+        if "nextval" in statement:
+            round_trips += 1
+
+    allocators = [AccountNumberAllocator() for _ in range(args.workers)]
+    strategies = (
+        ("uuid4[:12]", lambda conn, i: str(uuid.uuid4().int)[0:12]),
+        ("allocator", lambda conn, i: allocators[i % args.workers].allocate(conn)),
+    )
+    for label, make_number in strategies:
+        round_trips = 0
+        result = run(engine, make_number, args.accounts, args.batch)
+        print(
+            f"{label}: {result['accounts_per_sec']:,.0f} accounts/s ({result['seconds']:.1f}s), "
+            f"unique index {result['index_mb']:.1f} MiB, {round_trips} sequence round trips, "
+            f"{result['collisions']} collisions"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+State-update cost of the agent graph over a long session, full-list vs delta updates.
+
+Runs a graph shaped like app.agent.graph (classifier -> agent) on app.agent.state's
+schema with LLM-free nodes, feeding the growing transcript back in every turn the way
+/chat does. "full" nodes return state["messages"] + [msg] (the old style), "delta"
+nodes return [msg]. Reports time per turn at the start and end of the session, and
+checks that the transcript holds exactly one user and one bot message per turn:
+
+    python -m benchmarks.bench_agent_state --turns 500
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from app.agent.state import OverallState
+
+
+def build_graph(style: str):
+    def classifier(state: OverallState):
+        routing = AIMessage(content="Intent classified as 'help'. Routing to help_agent.")
+        if style == "full":
+            return {"messages": state["messages"] + [routing], "current_intent": "help"}
+        return {"internal_messages": [routing], "current_intent": "help"}
+
+    def agent(state: OverallState):
+        reply = AIMessage(content="How can I assist you? You can ask about your account or transactions.")
+        if style == "full":
+            return {"messages": state["messages"] + [reply]}
+        return {"messages": [reply]}
+
+    builder = StateGraph(OverallState)
+    builder.add_node("classifier", classifier)
+    builder.add_node("agent", agent)
+    builder.add_edge(START, "classifier")
+    builder.add_edge("classifier", "agent")
+    builder.add_edge("agent", END)
+    return builder.compile()
+
+
+async def run(style: str, turns: int, window: int) -> dict:
+    graph = build_graph(style)
+    history = []
+    timings = []
+    for turn in range(turns):
+        history.append(HumanMessage(content=f"What is my balance? ({turn})"))
+        started = time.perf_counter()
+        result = await graph.ainvoke({"messages": history, "current_intent": None, "banking_context": None})
+        timings.append(time.perf_counter() - started)
+        history = [m for m in result["messages"] if isinstance(m, (HumanMessage, AIMessage))]
+
+    return {
+        "first_ms": 1000 * sum(timings[:window]) / window,
+        "last_ms": 1000 * sum(timings[-window:]) / window,
+        "total_s": sum(timings),
+        "transcript": len(history),
+        "expected": 2 * turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--window", type=int, default=20)
+    args = parser.parse_args()
+
+    for style in ("full", "delta"):
+        result = asyncio.run(run(style, args.turns, args.window))
+        print(
+            f"{style}: {result['total_s']:.2f}s total, {result['first_ms']:.2f} ms/turn first {args.window}, "
+            f"{result['last_ms']:.2f} ms/turn last {args.window}, "
+            f"transcript {result['transcript']} messages (expected {result['expected']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-request overhead of the rate limiter against the configured Redis.
+
+Measures three paths of RateLimit.check: an allowed request (one GCRA script call),
+a rejected request that reaches Redis, and a rejected request answered by the
+in-process pre-filter (no round trip). Uses its own "bench" keys:
+
+    python -m benchmarks.bench_rate_limit --requests 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.core.rate_limit import RateLimit
+
+
+async def measure(limiter: RateLimit, identities, repeat: int) -> list[float]:
+    timings = []
+    for i in range(repeat):
+        identity = identities[i % len(identities)]
+        start = time.perf_counter()
+        await limiter.check(identity)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label}: median {statistics.median(timings) * 1e6:.0f} us, p99 {p99 * 1e6:.0f} us")
+
+
+async def main_async(requests: int):
+    # Generous limit over many identities: every request is allowed.
+    allowed = RateLimit("bench", f"{requests}/1")
+    identities = [f"bench-{uuid.uuid4().hex}" for _ in range(1000)]
+    report("allowed (1 round trip)", await measure(allowed, identities, requests))
+
+    # A fresh limiter per rejected request keeps the pre-filter cold, so each one reaches Redis.
+    timings = []
+    for _ in range(min(requests, 2000)):
+        cold = RateLimit("bench", "1/3600")
+        start = time.perf_counter()
+        await cold.check("bench-hot")
+        timings.append(time.perf_counter() - start)
+    report("rejected via Redis", timings)
+
+    blocked = RateLimit("bench", "1/3600")
+    await blocked.check("bench-hot")
+    report("rejected via pre-filter (0 round trips)", await measure(blocked, ["bench-hot"], requests))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests))
+
+
+if __name__ == "__main__":
+    main()
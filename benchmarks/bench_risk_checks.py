@@ -0,0 +1,77 @@
+"""
+Cost of the transfer risk pre-checks against the configured Redis.
+
+Runs the risk stage of create_transaction (RiskService.check, then RiskService.record
+for transfers that are not blocked) from several threads, as the threadpool runs
+transfers, and reports transfers/sec and check latency. Accounts get a warm history
+first so every rule has data to look at. Uses its own "bench" account ids:
+
+    python -m benchmarks.bench_risk_checks --transfers 50000 --threads 8
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from app.services.risk_checks import BLOCK, RiskService
+
+
+def warm(accounts: list[str], history: int):
+    for account_id in accounts:
+        for _ in range(history):
+            RiskService.record(account_id, uuid.uuid4(), f"payee-{random.randrange(20)}", Decimal(random.randrange(100, 5000)))
+
+
+def worker(accounts: list[str], transfers: int, timings: list[float], blocked: list[int]):
+    for _ in range(transfers):
+        account_id = random.choice(accounts)
+        amount = Decimal(random.randrange(100, 5000))
+        payee = f"payee-{random.randrange(25)}"
+        start = time.perf_counter()
+        risk = RiskService.check(account_id, payee, amount)
+        timings.append(time.perf_counter() - start)
+        if risk["decision"] == BLOCK:
+            blocked[0] += 1
+        else:
+            RiskService.record(account_id, uuid.uuid4(), payee, amount)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transfers", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--accounts", type=int, default=1_000)
+    parser.add_argument("--history", type=int, default=15)
+    args = parser.parse_args()
+
+    accounts = [f"bench-{uuid.uuid4().hex}" for _ in range(args.accounts)]
+    warm(accounts, args.history)
+
+    timings: list[float] = []
+    blocked = [0]
+    per_thread = args.transfers // args.threads
+    threads = [
+        threading.Thread(target=worker, args=(accounts, per_thread, timings, blocked))
+        for _ in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"{len(timings) / elapsed:,.0f} transfers/s through the risk stage ({args.threads} threads), "
+        f"check median {statistics.median(timings) * 1e6:.0f} us, p99 {p99 * 1e6:.0f} us, "
+        f"{blocked[0]} blocked"
+    )
+
+
+if __name__ == "__main__":
+    main()
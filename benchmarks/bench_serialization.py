@@ -0,0 +1,77 @@
+"""
+Serialization cost of a transaction list response, per 1k rows.
+
+Compares FastAPI's default path for `response_model=list[TransactionOut]` (Pydantic
+validation from attributes + jsonable_encoder + json.dumps) with the direct
+row-dict + orjson path used by /transactions/account/{account_number}:
+
+    python -m benchmarks.bench_serialization --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import timeit
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.db.schemas import TransactionStatusEnum
+from app.schemas import TransactionOut
+
+Row = namedtuple("Row", [
+    "transaction_id", "from_account_id", "to_account_number", "amount",
+    "status", "reference_id", "message_metadata", "created_at",
+])
+
+
+def make_rows(count: int) -> list[Row]:
+    account_id = uuid.uuid4()
+    now = datetime.utcnow()
+    return [
+        Row(uuid.uuid4(), account_id, f"{i:012d}", Decimal("1234.56"), TransactionStatusEnum.completed,
+            str(uuid.uuid4()), {"note": "rent"}, now - timedelta(minutes=i))
+        for i in range(count)
+    ]
+
+
+def pydantic_path(rows, adapter):
+    models = adapter.validate_python(rows, from_attributes=True)
+    return json.dumps(jsonable_encoder(models)).encode()
+
+
+def orjson_path(rows):
+    return orjson.dumps([
+        {
+            "transaction_id": row.transaction_id,
+            "from_account_id": row.from_account_id,
+            "to_account_number": row.to_account_number,
+            "amount": float(row.amount),
+            "status": row.status.value,
+            "reference_id": row.reference_id,
+            "message_metadata": row.message_metadata,
+            "created_at": row.created_at,
+        }
+        for row in rows
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(list[TransactionOut])
+    scale = 1000 / args.rows
+    for label, fn in (("pydantic+json", lambda: pydantic_path(rows, adapter)), ("rows+orjson", lambda: orjson_path(rows))):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{label:14} {best * 1000 * scale:8.2f} ms per 1k transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Insert throughput and primary-key index size for uuid4 vs uuid7 keys.
+
+Runs against DATABASE_URL (use a scratch database); creates and drops its own tables:
+
+    python -m benchmarks.bench_uuid_keys --rows 1000000 --batch 5000
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import config
+from app.db.ids import uuid7
+
+DDL = """
+CREATE UNLOGGED TABLE {table} (
+    id UUID PRIMARY KEY,
+    session_id UUID NOT NULL,
+    content VARCHAR NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+)
+"""
+
+
+def run(engine, table: str, make_id, rows: int, batch: int) -> dict:
+    session_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(DDL.format(table=table)))
+
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        params = [
+            {"id": make_id(), "session_id": session_id, "content": "x" * 64}
+            for _ in range(min(batch, rows - offset))
+        ]
+        with engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {table} (id, session_id, content) VALUES (:id, :session_id, :content)"), params)
+    elapsed = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        index_bytes = conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+        conn.execute(text(f"DROP TABLE {table}"))
+    return {"rows_per_sec": rows / elapsed, "seconds": elapsed, "pkey_mb": index_bytes / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    args = parser.parse_args()
+
+    engine = create_engine(config.DATABASE_URL)
+    for label, make_id in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        result = run(engine, f"bench_keys_{label}", make_id, args.rows, args.batch)
+        print(
+            f"{label}: {result['rows_per_sec']:,.0f} rows/s "
+            f"({result['seconds']:.1f}s), pkey index {result['pkey_mb']:.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
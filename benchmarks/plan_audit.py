@@ -0,0 +1,228 @@
+"""
+Query-plan regression audit for the ORM query paths in app/api and app/services.
+
+Seeds a scratch database at realistic volumes, runs each read path through the real
+route/service functions while capturing the SQL they emit, EXPLAINs every captured
+statement and fails (exit code 1) when a plan sequentially scans a large relation or
+differs from the recorded baseline.
+
+    python -m benchmarks.plan_audit --database-url postgresql://.../plan_audit --seed --scale 1
+    python -m benchmarks.plan_audit --database-url ... --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "plan_baseline.json")
+# Relations with fewer estimated rows than this may be sequentially scanned.
+SEQ_SCAN_MIN_ROWS = 10_000
+# A plan whose estimated total cost grows past this factor of the baseline is a regression.
+COST_REGRESSION_FACTOR = 2.0
+
+SEED_SQL = [
+    """
+    INSERT INTO users (user_id, name, email, phone_number, password, is_active, created_at)
+    SELECT gen_random_uuid(), 'user ' || g, 'user' || g || '@example.com', '9' || lpad(g::text, 9, '0'),
+           'not-a-hash', true, now() - (g % 365) * interval '1 day'
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO accounts (account_id, user_id, account_number, account_type, balance, currency, is_active)
+    SELECT gen_random_uuid(), u.user_id, lpad((row_number() OVER ())::text, 12, '0'),
+           CASE WHEN n = 1 THEN 'SAVINGS' ELSE 'CURRENT' END, 1000 + random() * 100000, 'INR', n = 1 OR random() < 0.8
+    FROM users u CROSS JOIN generate_series(1, :accounts_per_user) n
+    """,
+    """
+    INSERT INTO sessions (session_id, user_id, started_at, ended_at, is_active)
+    SELECT gen_random_uuid(), u.user_id, now() - n * interval '3 days',
+           CASE WHEN n = 0 THEN NULL ELSE now() - n * interval '3 days' + interval '20 minutes' END, n = 0
+    FROM users u CROSS JOIN generate_series(0, :sessions_per_user - 1) n
+    """,
+    """
+    INSERT INTO messages (message_id, session_id, sender, content, "timestamp")
+    SELECT gen_random_uuid(), s.session_id, CASE WHEN n % 2 = 0 THEN 'user' ELSE 'bot' END::senderenum,
+           'message ' || n, s.started_at + n * interval '30 seconds'
+    FROM sessions s CROSS JOIN generate_series(0, :messages_per_session - 1) n
+    """,
+    """
+    INSERT INTO transactions (transaction_id, from_account_id, to_account_number, amount, status, reference_id, created_at)
+    SELECT gen_random_uuid(), a.account_id, lpad((1 + floor(random() * 999999))::text, 12, '0'),
+           round((random() * 5000)::numeric, 2), 'completed', gen_random_uuid()::text,
+           now() - (random() * 360) * interval '1 day'
+    FROM accounts a CROSS JOIN generate_series(1, :transactions_per_account) n
+    """,
+]
+
+
+def seed(engine, scale: float):
+    from app.db import Base, models  # noqa: F401  (registers the tables)
+    from app.db.partitions import add_months, ensure_partitions, partitioned_tables
+
+    volumes = {
+        "users": int(20_000 * scale),
+        "accounts_per_user": 2,
+        "sessions_per_user": 15,
+        "messages_per_session": 20,
+        "transactions_per_account": 40,
+    }
+    with engine.begin() as conn:
+        today = datetime.utcnow().date()
+        for table in partitioned_tables():
+            ensure_partitions(conn, table, add_months(today, -13), add_months(today, 3))
+        for statement in SEED_SQL:
+            conn.execute(text(statement), volumes)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"Seeded {volumes}")
+
+
+def scenarios(db):
+    """
+    Each entry exercises one read path the way the API calls it.
+    """
+    from fastapi import Response
+    from app.api import accounts, sessions, transactions
+    from app.db.models import Account, ChatSession, Transaction, User
+    from app.services.context_service import BankingContextService
+    from app.services.session_service import ActiveSessionService
+
+    user = db.query(User).filter(User.email == "user4242@example.com").first()
+    account = db.query(Account).filter(Account.user_id == user.user_id, Account.is_active == True).first()
+    session = db.query(ChatSession).filter(ChatSession.user_id == user.user_id).order_by(ChatSession.started_at.desc()).offset(3).first()
+    tx = db.query(Transaction).filter(Transaction.from_account_id == account.account_id).first()
+
+    return {
+        "auth.login_user": lambda: db.query(User).filter(User.email == user.email).first(),
+        "accounts.get_account_info": lambda: asyncio.run(accounts.get_account_info(db=db, current_user=user)),
+        "accounts.list_accounts": lambda: accounts.list_accounts(db=db, current_user=user),
+        "sessions.active_session_fallback": lambda: ActiveSessionService.load(user.user_id, db),
+        "sessions.get_user_sessions": lambda: sessions.get_user_sessions(Response(), db=db, current_user=user),
+        "sessions.get_messages": lambda: sessions.get_messages(str(session.session_id), Response(), db=db, current_user=user),
+        "transactions.get_transaction": lambda: transactions.get_transaction(str(tx.transaction_id), db=db, current_user=user),
+        "transactions.get_transactions_by_account": lambda: transactions.get_transactions_by_account(
+            account.account_number, since=datetime.utcnow() - timedelta(days=30), until=None, db=db, current_user=user),
+        "transactions.incoming_by_number": lambda: db.query(Transaction).filter(
+            Transaction.to_account_number == account.account_number).all(),
+        "context.build": lambda: BankingContextService.build(user.user_id, db),
+    }
+
+
+def capture(engine, fn) -> list[tuple[str, object]]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+_PARTITION_SUFFIX = re.compile(r"_(p\d{4}_\d{2}|default)$")
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def explain(conn, statement: str, parameters) -> dict:
+    cursor = conn.connection.dbapi_connection.cursor()
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    return cursor.fetchone()[0][0]["Plan"]
+
+
+def summarize(conn, plan: dict) -> dict:
+    shape, seq_scans = [], []
+    for node in walk(plan):
+        relation = node.get("Relation Name")
+        parent = _PARTITION_SUFFIX.sub("", relation) if relation else None
+        step = node["Node Type"] + (f" on {parent}" if parent else "") + (f" using {node['Index Name']}" if "Index Name" in node else "")
+        if step not in shape:
+            shape.append(step)
+        if node["Node Type"] == "Seq Scan" and relation:
+            rows = conn.execute(text("SELECT reltuples FROM pg_class WHERE relname = :name"), {"name": relation}).scalar() or 0
+            if rows >= SEQ_SCAN_MIN_ROWS:
+                seq_scans.append(f"{relation} (~{int(rows)} rows)")
+    return {"shape": shape, "cost": plan["Total Cost"], "seq_scans": seq_scans}
+
+
+def audit(engine) -> dict:
+    Session = sessionmaker(bind=engine, autoflush=False)
+    results = {}
+    with Session() as db:
+        for name, fn in scenarios(db).items():
+            db.rollback()
+            with engine.connect() as conn:
+                for index, (statement, parameters) in enumerate(capture(engine, fn)):
+                    results[f"{name}#{index}"] = summarize(conn, explain(conn, statement, parameters))
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    failures = []
+    for key, result in results.items():
+        for scan in result["seq_scans"]:
+            failures.append(f"{key}: sequential scan on {scan}")
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if result["shape"] != previous["shape"]:
+            failures.append(f"{key}: plan changed\n    was: {previous['shape']}\n    now: {result['shape']}")
+        elif result["cost"] > previous["cost"] * COST_REGRESSION_FACTOR:
+            failures.append(f"{key}: estimated cost {result['cost']:.0f} vs baseline {previous['cost']:.0f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=os.environ.get("PLAN_AUDIT_DATABASE_URL"), required=False)
+    parser.add_argument("--seed", action="store_true", help="seed the (empty, migrated) database first")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or PLAN_AUDIT_DATABASE_URL is required (use a scratch database)")
+
+    from app.core.config import config
+    # The audit needs the SQL each path runs, not cache hits.
+    config.READ_CACHE_ENABLED = False
+
+    engine = create_engine(args.database_url)
+    if args.seed:
+        seed(engine, args.scale)
+
+    results = audit(engine)
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH} ({len(results)} statements)")
+        return
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as fh:
+            baseline = json.load(fh)
+    failures = compare(results, baseline)
+    for key, result in sorted(results.items()):
+        print(f"{key:55} cost={result['cost']:>10.1f}  {' -> '.join(result['shape'])}")
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: {len(results)} statements, no sequential scans or plan regressions")
+
+
+if __name__ == "__main__":
+    main()